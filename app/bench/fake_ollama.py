@@ -0,0 +1,149 @@
+"""
+Stand-in for the parts of the Ollama HTTP API the backend uses.
+
+    python -m app.bench.fake_ollama --port 11434 --first-token-ms 40 --token-ms 15
+    OLLAMA_HOST=http://127.0.0.1:11434 python -m hypercorn app.main:app
+
+Serves GET /, GET /api/tags and POST /api/chat (streamed NDJSON or a
+single JSON body with "stream": false) over keep-alive HTTP/1.1, so the
+pooled client, streaming and deadline fallbacks can be exercised without
+a model. Connection and request counts are printed on exit.
+"""
+import argparse
+import asyncio
+import json
+import signal
+import time
+from datetime import datetime, timezone
+
+_REPLY = "I saw someone near the reactor, stay close and watch each other"
+
+
+class FakeOllama:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.peak = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+
+                if method == "POST" and path == "/api/chat":
+                    await self._chat(writer, json.loads(body or b"{}"))
+                elif method == "GET" and path == "/api/tags":
+                    self._send(writer, 200, {"models": [{"name": self.args.model}]})
+                elif method in ("GET", "HEAD") and path == "/":
+                    self._send(writer, 200, "Ollama is running")
+                else:
+                    self._send(writer, 404, {"error": "not found"})
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _send(self, writer: asyncio.StreamWriter, status: int, payload) -> None:
+        if isinstance(payload, str):
+            data, ctype = payload.encode(), "text/plain"
+        else:
+            data, ctype = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: {ctype}\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+
+    def _chunk(self, model: str, content: str, done: bool, **extra) -> bytes:
+        return json.dumps({
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+            **extra
+        }).encode() + b"\n"
+
+    async def _chat(self, writer: asyncio.StreamWriter, body: dict) -> None:
+        model = body.get("model", self.args.model)
+        limit = body.get("options", {}).get("num_predict", -1)
+        words = self.args.reply.split()
+        if limit is not None and limit > 0:
+            words = words[:limit]
+        pieces = [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        started = time.perf_counter_ns()
+        try:
+            await asyncio.sleep(self.args.first_token_ms / 1000)
+            if not body.get("stream", True):
+                await asyncio.sleep(self.args.token_ms * max(0, len(pieces) - 1) / 1000)
+                self._send(writer, 200, json.loads(self._chunk(
+                    model, "".join(pieces), True, done_reason="stop", eval_count=len(pieces)
+                )))
+                return
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n"
+            )
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(self.args.token_ms / 1000)
+                self._write_chunk(writer, self._chunk(model, piece, False))
+                await writer.drain()
+            self._write_chunk(writer, self._chunk(
+                model, "", True,
+                done_reason="stop",
+                eval_count=len(pieces),
+                total_duration=time.perf_counter_ns() - started
+            ))
+            writer.write(b"0\r\n\r\n")
+        finally:
+            self.active -= 1
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+async def main(args: argparse.Namespace) -> None:
+    fake = FakeOllama(args)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    server = await asyncio.start_server(fake.handle, args.host, args.port)
+    print(f"fake ollama on http://{args.host}:{args.port}", flush=True)
+    async with server:
+        await stop.wait()
+    print(f"connections={fake.connections} requests={fake.requests} peak_concurrency={fake.peak}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a minimal Ollama-compatible API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", default="mistral")
+    parser.add_argument("--reply", default=_REPLY, help="text streamed back word by word")
+    parser.add_argument("--first-token-ms", type=float, default=40.0, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="delay between tokens")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,109 @@
+"""
+End-to-end check of the Ollama path against the stand-in server.
+
+    python -m app.bench.llm_stream_check
+
+Serves app.bench.fake_ollama in-process on a free port, points the app
+at it and forces one agent to chat over /ws, twice:
+
+  1. model faster than the tick deadline: chat_stream frames arrive for
+     the line and the tick's delta.chat carries their stream_id and text
+  2. model slower than the deadline: the line falls back to a template,
+     nothing is streamed and llm.calls.fallback_timeout goes up
+
+Exits non-zero on the first failed check. Uses the maps in MODELS_DIR.
+"""
+import argparse
+import asyncio
+import os
+import threading
+from typing import List
+
+from app.bench.fake_ollama import FakeOllama, _REPLY
+
+_TICK = 0.5
+
+
+def _serve_fake(fake: FakeOllama) -> str:
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(fake.handle, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, name="fake-ollama", daemon=True).start()
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def _check(ok: bool, what: str) -> None:
+    print(f"{'ok  ' if ok else 'FAIL'} {what}", flush=True)
+    if not ok:
+        raise SystemExit(1)
+
+
+def _chat_once(client, ws) -> tuple[str, List[dict], dict]:
+    agents = [a for a in client.get("/state").json()["agents"] if a["alive"]]
+    agent_id = next(a["id"] for a in agents if a["chat_cooldown"] == 0)
+    # everyone else idles, so no bot kills the speaker or talks over it this tick
+    actions = {a["id"]: {} for a in agents}
+    actions[agent_id] = {"do_chat": True}
+    ws.send_json({"external_actions": actions})
+    frames = []
+    while True:
+        frame = ws.receive_json()
+        frames.append(frame)
+        if "delta" in frame:
+            break
+    # tokens are relayed by their own task, so flush it before looking at them
+    ws.send_json({"ping": 0})
+    while "pong" not in frames[-1]:
+        frames.append(ws.receive_json())
+
+    streamed = [f["chat_stream"] for f in frames if "chat_stream" in f and f["chat_stream"]["from"] == agent_id]
+    line = next(
+        (m for f in frames if "delta" in f for m in f["delta"]["chat"] if m.get("from") == agent_id),
+        None
+    )
+    return agent_id, streamed, line
+
+
+def main(args: argparse.Namespace) -> None:
+    fake = FakeOllama(argparse.Namespace(model="mistral", reply=_REPLY, first_token_ms=20.0, token_ms=5.0))
+    os.environ.update({
+        "OLLAMA_HOST": _serve_fake(fake),
+        "LLM_BACKEND": "ollama",
+        "LLM_STREAM": "true",
+        "LLM_PREGEN_ENABLED": "false",
+        "TICK_DURATION": str(_TICK),
+        "ENABLE_AUTO_TICK": "false",
+        "CHECKPOINT_RESTORE": "false",
+        "CHECKPOINT_INTERVAL_TICKS": "0",
+        "RECORD_ENABLED": "false",
+    })
+    # settings are read at import, after the environment above is in place
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/init")
+        with client.websocket_connect("/ws") as ws:
+            ws.receive_json()  # full_state
+
+            agent_id, streamed, line = _chat_once(client, ws)
+            _check(line is not None, f"{agent_id} spoke in delta.chat")
+            _check(len(streamed) > 0, f"{len(streamed)} chat_stream frames before the tick frame")
+            _check(len({s["id"] for s in streamed}) == 1, "all frames share one stream id")
+            _check(line.get("stream_id") == streamed[0]["id"], "delta.chat line carries the stream id")
+            _check("".join(s["text"] for s in streamed).strip() == line["text"], "streamed text matches the final line")
+
+            before = client.get("/stats").json()["llm"]["calls"]["fallback_timeout"]
+            fake.args.first_token_ms = args.slow_ms
+            agent_id, streamed, line = _chat_once(client, ws)
+            after = client.get("/stats").json()["llm"]["calls"]["fallback_timeout"]
+            _check(line is not None and line["text"], f"{agent_id} still spoke with a {args.slow_ms:.0f}ms model")
+            _check(after > before, f"fallback_timeout {before} -> {after}")
+            _check(not streamed and "stream_id" not in line, "nothing streamed for the template line")
+
+    print(f"connections={fake.connections} requests={fake.requests} peak_concurrency={fake.peak}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check streaming and deadline fallback against a stand-in Ollama")
+    parser.add_argument("--slow-ms", type=float, default=_TICK * 4000, help="first-token delay of the slow model")
+    main(parser.parse_args())
@@ -0,0 +1,240 @@
+"""
+WebSocket load generator for /ws.
+
+    python -m app.bench.ws_load --clients 10,100,300 --payload 0,1024 --duration 10
+    python -m app.bench.ws_load --url ws://host:8000/ws --clients 200
+
+Without --url the app is served in-process by hypercorn on localhost
+(server CPU then includes the simulated clients). Needs the packages in
+requirements-bench.txt. Tick-to-receive latency compares the server's
+send time ("ts" on every tick frame) with the client clock, so it is
+exact in-process and only as good as clock sync against a remote --url.
+Round-trip latency is timed on the client clock alone, with
+{"ping": t} / {"pong": t} messages over the same socket as the tick
+frames. Late frames are judged against the tick interval the server
+reports in GET /stats.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import urlparse
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+@dataclass
+class ClientStats:
+    frames: int = 0
+    bytes: int = 0
+    sent: int = 0
+    late: int = 0
+    dropped: int = 0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+    rtts: List[float] = field(default_factory=list)
+    gaps: List[float] = field(default_factory=list)
+
+
+def _http(base: str, method: str, path: str) -> dict:
+    req = urllib.request.Request(base + path, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _client(url: str, stats: ClientStats, stop: float, payload: int, send_rate: float,
+                  ping_rate: float, interval: float, agent_ids: List[str]) -> None:
+    pad = "x" * payload
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            await ws.recv()  # full_state handshake
+
+            async def sender():
+                if send_rate <= 0:
+                    return
+                while time.time() < stop:
+                    await asyncio.sleep(random.expovariate(send_rate))
+                    msg = {"external_actions": {random.choice(agent_ids): {"move": random.randint(0, 4)}}}
+                    if pad:
+                        msg["pad"] = pad
+                    await ws.send(json.dumps(msg))
+                    stats.sent += 1
+
+            async def pinger():
+                if ping_rate <= 0:
+                    return
+                while time.time() < stop:
+                    await asyncio.sleep(random.expovariate(ping_rate))
+                    await ws.send(json.dumps({"ping": time.perf_counter()}))
+
+            tasks = [asyncio.create_task(sender()), asyncio.create_task(pinger())]
+            last_tick: Optional[int] = None
+            last_at: Optional[float] = None
+            try:
+                while True:
+                    remaining = stop - time.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    now = time.perf_counter()
+                    wall = time.time()
+                    frame = json.loads(raw)
+                    stats.bytes += len(raw)
+                    if "pong" in frame:
+                        stats.rtts.append(now - frame["pong"])
+                        continue
+                    # only broadcast ticks; acks and direct-step replies don't follow the tick clock
+                    if "delta" not in frame or "ack" in frame:
+                        continue
+                    stats.frames += 1
+                    if "ts" in frame:
+                        stats.latencies.append(wall - frame["ts"])
+                    if last_at is not None:
+                        gap = now - last_at
+                        stats.gaps.append(gap)
+                        # a whole tick slot passed without a frame
+                        if gap > 2 * interval:
+                            stats.late += 1
+                    last_at = now
+                    tick = frame.get("tick")
+                    if last_tick is not None and tick is not None and tick > last_tick + 1:
+                        stats.dropped += tick - last_tick - 1
+                    last_tick = tick
+            finally:
+                for task in tasks:
+                    task.cancel()
+    except Exception:
+        stats.errors += 1
+
+
+async def run_round(url: str, base: str, clients: int, payload: int, duration: float,
+                    send_rate: float, ping_rate: float, agent_ids: List[str]) -> dict:
+    server = await asyncio.to_thread(_http, base, "GET", "/stats")
+    before = server.get("process", {})
+    # the server's own (possibly stretched) tick interval, not this machine's settings
+    interval = server["scheduler"]["interval"]
+    stop = time.time() + duration
+    all_stats = [ClientStats() for _ in range(clients)]
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(url, s, stop, payload, send_rate, ping_rate, interval, agent_ids) for s in all_stats
+    ))
+    elapsed = time.perf_counter() - started
+    after = (await asyncio.to_thread(_http, base, "GET", "/stats")).get("process", {})
+
+    latencies = [l for s in all_stats for l in s.latencies]
+    rtts = [r for s in all_stats for r in s.rtts]
+    gaps = [g for s in all_stats for g in s.gaps]
+    frames = sum(s.frames for s in all_stats)
+    cpu = after.get("cpu_secs", 0.0) - before.get("cpu_secs", 0.0)
+    return {
+        "clients": clients,
+        "payload": payload,
+        "frames": frames,
+        "frames_per_s": round(frames / elapsed, 1),
+        "mb_per_s": round(sum(s.bytes for s in all_stats) / elapsed / 1e6, 3),
+        "sent": sum(s.sent for s in all_stats),
+        "tick_ms": round(interval * 1000, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+        "rtt_p50_ms": round(_percentile(rtts, 0.50) * 1000, 2),
+        "rtt_p95_ms": round(_percentile(rtts, 0.95) * 1000, 2),
+        "rtt_p99_ms": round(_percentile(rtts, 0.99) * 1000, 2),
+        "rtt_max_ms": round(max(rtts, default=0.0) * 1000, 2),
+        "gap_p99_ms": round(_percentile(gaps, 0.99) * 1000, 2),
+        "late": sum(s.late for s in all_stats),
+        "dropped": sum(s.dropped for s in all_stats),
+        "errors": sum(s.errors for s in all_stats),
+        "server_cpu_s": round(cpu, 3),
+        "server_cpu_pct": round(100 * cpu / elapsed, 1),
+    }
+
+
+async def _serve_in_process(port: int, shutdown: asyncio.Event) -> None:
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from app.main import app
+
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.loglevel = "WARNING"
+    await serve(app, config, shutdown_trigger=shutdown.wait)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if websockets is None:
+        raise SystemExit("ws_load needs the 'websockets' package (pip install -r requirements-bench.txt)")
+
+    server_task = None
+    shutdown = asyncio.Event()
+    url = args.url
+    if url is None:
+        server_task = asyncio.create_task(_serve_in_process(args.port, shutdown))
+        url = f"ws://127.0.0.1:{args.port}/ws"
+
+    parsed = urlparse(url)
+    base = f"{'https' if parsed.scheme == 'wss' else 'http'}://{parsed.netloc}"
+    for _ in range(100):
+        try:
+            await asyncio.to_thread(_http, base, "GET", "/ping")
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    init = await asyncio.to_thread(_http, base, "POST", "/init")
+    agent_ids = [a["id"] for a in init["agents"]]
+
+    results = []
+    try:
+        for clients in args.clients:
+            for payload in args.payload:
+                res = await run_round(url, base, clients, payload, args.duration,
+                                      args.send_rate, args.ping_rate, agent_ids)
+                # p50..max_ms are exact only when server and clients share a clock
+                res["shared_clock"] = args.url is None
+                results.append(res)
+                if not args.json:
+                    print(" ".join(f"{k}={v}" for k, v in res.items()), flush=True)
+    finally:
+        if server_task is not None:
+            shutdown.set()
+            await server_task
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the /ws endpoint")
+    parser.add_argument("--url", help="ws:// URL of a running server; default serves the app in-process")
+    parser.add_argument("--port", type=int, default=8765, help="port for the in-process server")
+    parser.add_argument("--clients", type=_ints, default=[10, 50, 100], help="comma-separated client counts")
+    parser.add_argument("--payload", type=_ints, default=[0], help="comma-separated padding bytes per sent message")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per round")
+    parser.add_argument("--send-rate", type=float, default=0.0, help="external_actions messages per second per client")
+    parser.add_argument("--ping-rate", type=float, default=2.0, help="round-trip probes per second per client")
+    parser.add_argument("--json", action="store_true", help="print all rounds as JSON at the end")
+    asyncio.run(main(parser.parse_args()))
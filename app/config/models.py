@@ -1,6 +1,6 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field, conint
-from typing import List, Dict, Optional, Literal
+from pydantic import BaseModel, Field, conint, model_validator
+from typing import List, Dict, Optional, Literal, Union
 
 Point = List[int]
 Polygon = List[Point]
@@ -58,6 +58,16 @@ class Delta(BaseModel):
   infections: Dict[str, bool] = Field(default_factory=dict)
   trust: Dict[str, float] = Field(default_factory=dict)
   chat: List[Dict] = Field(default_factory=list)
+  group_chats: List[Dict] = Field(default_factory=list)
+
+  def merge(self, later: Delta) -> Delta:
+    # state fields keep the latest value, event lists are concatenated in tick order
+    self.positions.update(later.positions)
+    self.infections.update(later.infections)
+    self.trust.update(later.trust)
+    self.chat.extend(later.chat)
+    self.group_chats.extend(later.group_chats)
+    return self
 
 
 class Action(BaseModel):
@@ -70,6 +80,7 @@ class Action(BaseModel):
 
 
 class GroupChatSession(BaseModel):
+  id: str
   members: set[str]
   timer: int
 
@@ -82,9 +93,53 @@ class StepResponse(BaseModel):
   delta: Delta
 
 
+class StepBatchRequest(BaseModel):
+  # one entry per tick; ticks past the end of the list are played by the bots
+  actions: List[Dict[str, Action]] = Field(default_factory=list)
+  ticks: Optional[conint(ge=1)] = None
+  merge: bool = False
+  stream: bool = False
+  use_llm: bool = False
+  stop_on_win: bool = False
+
+  @model_validator(mode="after")
+  def _check_ticks(self) -> StepBatchRequest:
+    if self.ticks is None:
+      if not self.actions:
+        raise ValueError("either actions or ticks is required")
+      self.ticks = len(self.actions)
+    elif self.ticks < len(self.actions):
+      raise ValueError("ticks is shorter than actions")
+    if self.merge and self.stream:
+      raise ValueError("merged deltas cannot be streamed")
+    return self
+
+
+class StepBatchResponse(BaseModel):
+  tick: int
+  ticks: int
+  delta: Optional[Delta] = None
+  steps: Optional[List[StepResponse]] = None
+
+
+TileFormat = Literal["rle", "bitpack", "legacy", "none"]
+# formats that actually carry the grid, for /tiles
+GridFormat = Literal["rle", "bitpack", "legacy"]
+
+
+class EncodedTiles(BaseModel):
+  encoding: Literal["rle", "bitpack"]
+  width: int
+  height: int
+  bits: int
+  data: str
+  etag: str
+
+
 class FullState(BaseModel):
   tick: int
   map_size: Point
-  tiles: List[List[int]]
+  tiles: Optional[Union[EncodedTiles, List[List[int]]]] = None
+  tiles_url: Optional[str] = None
   agents: List[AgentInfo]
   chat_log: List[Dict]
\ No newline at end of file
@@ -7,6 +7,8 @@ class Settings(BaseSettings):
 
 	MODELS_DIR: str = "data/models"
 	JSON_DIR: str = "data/json"
+	ASSET_CACHE_DIR: str = "data/.asset_cache"
+	ASSET_MIN_COMPRESS_BYTES: int = 1024
 
 	TICK_DURATION: float = 1/3 # seconds for one tick
 	GAME_DURATION_SECS: int = 5 * 60 # 5 minutes
@@ -14,17 +16,60 @@ class Settings(BaseSettings):
 	KILL_DELAY_TICKS: int = int(1.0 / TICK_DURATION)
 	KILL_RADIUS: int = 4
 	VOTE_DURATION_TICKS: int = 9
+	MAX_CONCURRENT_VOTES: int = 2
 	HEAR_RADIUS: int = 6
 
 	FOV_DISTANCE: int = 5
 	FOV_ANGLE: float = 90
 
+	BOT_REPLAN_INTERVAL: int = 6 # ticks between scheduled bot re-plans
+
+	# none | template | ollama
+	LLM_BACKEND: str = "ollama"
 	LLM_MODEL: str = "mistral"
 	# LLM_MODEL: str = "llama3:8b"
 	LLM_CACHE_TTL: int = 60
 	LLM_MAX_TOKENS: int = 10
+	LLM_PROMPT_TOKEN_BUDGET: int = 160
+	LLM_PROMPT_TOP_SUSPECTS: int = 3
+	LLM_PROMPT_CHAT_LINES: int = 5
+	LLM_PROMPT_CHAT_CHARS: int = 80
+	LLM_DEADLINE_FRACTION: float = 0.5 # share of TICK_DURATION all LLM calls of a tick may wait
+	LLM_REQUEST_TIMEOUT: float = 10.0
+	OLLAMA_HOST: str = "http://127.0.0.1:11434"
+	LLM_CONCURRENCY: int = 2 # pooled connections / requests in flight to Ollama
+	LLM_STREAM: bool = True # push partial chat tokens to /ws subscribers
+	LLM_MAX_PENDING: int = 2
+	LLM_RETRY_SECS: float = 5.0
+	LLM_PREGEN_ENABLED: bool = True
+	LLM_PREGEN_HORIZON_TICKS: int = 6
+	LLM_PREGEN_QUEUE_SIZE: int = 2
+	LLM_PREGEN_MAX_JOBS: int = 32
+	LLM_PREGEN_MAX_PER_TICK: int = 4 # prompts built on the tick path for speculation
+	LLM_PREGEN_GROUP_MARGIN: int = 2 # tiles beyond GROUP_CHAT_RADIUS that count as about to group
 
 	ENABLE_AUTO_TICK: bool = True
+	STEP_BATCH_MAX_TICKS: int = 1000
+
+	CHECKPOINT_DIR: str = "data/checkpoints"
+	CHECKPOINT_INTERVAL_TICKS: int = 30 # 0 disables checkpoints
+	CHECKPOINT_RESTORE: bool = True # resume the last checkpoint at startup
+
+	# run | headless | hibernate, applied when no /ws client or request arrived for IDLE_GRACE_SECS
+	IDLE_POLICY: str = "hibernate"
+	IDLE_GRACE_SECS: float = 10.0
+	TICK_MAX_DURATION: float = 1.0
+	TICK_OVERLOAD_RATIO: float = 0.8
+
+	# rle | bitpack | legacy | none
+	TILES_FORMAT: str = "rle"
+	WS_TILES_FORMAT: str = "none"
+
+	# per-tick agent arrays and events written as chunked .npy columns (needs numpy)
+	RECORD_ENABLED: bool = False
+	RECORD_DIR: str = "data/trajectories"
+	RECORD_CHUNK_TICKS: int = 1024
+	RECORD_MAX_PENDING_CHUNKS: int = 4
 
 	GROUP_CHAT_RADIUS: int = 5
 	GROUP_CHAT_MIN: int = 3
@@ -1,15 +1,23 @@
-import uvloop, asyncio
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from contextlib import asynccontextmanager
-from app.config.settings import settings
-from app.routers.init import router as init_router
-from app.routers.step import router as step_router
-from app.routers.state import router as state_router
-from app.routers.web_socket import  router as ws_router, broadcast
-from app.services.manager.manager import GameManager
-
-from app.services.llm.llm_service import LLMService
+from app.services.utils.profiling import StartupProfile
+
+with StartupProfile.phase("imports"):
+    import uvloop, asyncio, time
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+    from contextlib import asynccontextmanager
+    from app.config.settings import settings
+    from app.routers.init import router as init_router
+    from app.routers.step import router as step_router
+    from app.routers.state import router as state_router
+    from app.routers.stats import router as stats_router
+    from app.routers.assets import router as assets_router
+    from app.routers.web_socket import  router as ws_router, broadcast, subscriber_count
+    from app.services.manager.manager import GameManager
+    from app.services.manager.scheduler import TickScheduler
+    from app.services.assets.pipeline import AssetPipeline
+    from app.services.recording.trajectory import TrajectoryRecorder
+
+    from app.services.llm.llm_service import LLMService
 # from app.services.rl_service import RLService  # подключите, когда будете тестировать RL
 
 uvloop.install()
@@ -17,20 +25,63 @@ uvloop.install()
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     task = None
-    LLMService.initialize()
+    warmup = None
+    # hashing and brotli-11 run off the startup path; until then /init hands out the plain URLs
+    # and /assets serves identity bytes for entries whose variants aren't written yet
+    assets = asyncio.create_task(asyncio.to_thread(AssetPipeline.build))
+    if settings.CHECKPOINT_RESTORE:
+        with StartupProfile.phase("restore"):
+            try:
+                if GameManager.restore():
+                    print(f"♻️ Restored game at tick {GameManager.get_state().tick}")
+            except Exception as e:
+                print(f"⚠️ Checkpoint not restored: {e}")
+    if settings.LLM_BACKEND == "ollama":
+        # the model client loads off the startup path; the first tick waits for it if needed
+        warmup = asyncio.create_task(asyncio.to_thread(LLMService.initialize))
+    elif settings.LLM_BACKEND == "template":
+        with StartupProfile.phase("llm"):
+            LLMService.initialize()
+
+    streamer = None
+    if settings.LLM_STREAM and settings.LLM_BACKEND == "ollama":
+        # partial chat tokens arrive on the LLM client thread and are relayed in order from here
+        loop = asyncio.get_running_loop()
+        stream_events: asyncio.Queue = asyncio.Queue()
+        LLMService.set_stream_sink(lambda event: loop.call_soon_threadsafe(stream_events.put_nowait, event))
+
+        async def relay():
+            while True:
+                await broadcast(await stream_events.get())
+
+        streamer = asyncio.create_task(relay())
 
     if settings.ENABLE_AUTO_TICK and settings.MODE == "deterministic":
         async def ticker():
             while True:
                 try:
-                    await asyncio.sleep(settings.TICK_DURATION)
+                    interval = TickScheduler.interval()
+                    slept = time.perf_counter()
+                    await asyncio.sleep(interval)
+                    lag = time.perf_counter() - slept - interval
+
+                    mode = TickScheduler.mode(subscriber_count())
+                    if mode == "hibernate":
+                        await TickScheduler.wait_for_activity()
+                        continue
+
+                    started = time.perf_counter()
                     try:
-                        delta = GameManager.step_deterministic({})
+                        # stepping off the loop keeps streamed tokens and /ws traffic flowing during LLM waits;
+                        # nobody watches a headless game, so skip the model entirely
+                        tick, delta = await asyncio.to_thread(GameManager.step_deterministic, {}, mode == "run")
                     except RuntimeError:
                         continue
+                    TickScheduler.record_step(time.perf_counter() - started, lag)
 
                     payload = {
-                        "tick": GameManager.get_state().tick,
+                        "tick": tick,
+                        "ts": time.time(),
                         "delta": delta.model_dump()
                     }
                     await broadcast(payload)
@@ -41,12 +92,29 @@ async def lifespan(_app: FastAPI):
 
         task = asyncio.create_task(ticker())
 
+    StartupProfile.ready()
+    print(f"🚀 Startup: {StartupProfile.summary()}")
+
     yield
 
+    AssetPipeline.stop()
+    await assets
+    if warmup is not None:
+        await warmup
+    if streamer is not None:
+        LLMService.set_stream_sink(None)
+        streamer.cancel()
+    # the partial chunk of the running game is written before exit
+    await asyncio.to_thread(TrajectoryRecorder.close)
+
     if settings.ENABLE_AUTO_TICK and settings.MODE == "deterministic":
         task.cancel()
         print("🚀 Auto-ticker stopped")
 
+    if settings.CHECKPOINT_INTERVAL_TICKS > 0:
+        # waits for a step still running in its thread, so the game resumes exactly here
+        await asyncio.to_thread(GameManager.checkpoint)
+
 app = FastAPI(
     title="Social Deduction Game API",
     version="0.1.0",
@@ -55,13 +123,15 @@ app = FastAPI(
 		lifespan=lifespan
 )
 
-app.mount("/models", StaticFiles(directory=settings.MODELS_DIR), name="models")
-app.mount("/json", StaticFiles(directory=settings.JSON_DIR), name="json")
+app.mount("/models", StaticFiles(directory=settings.MODELS_DIR, check_dir=False), name="models")
+app.mount("/json", StaticFiles(directory=settings.JSON_DIR, check_dir=False), name="json")
 
 app.include_router(init_router)
 app.include_router(step_router)
 app.include_router(state_router)
 app.include_router(ws_router)
+app.include_router(stats_router)
+app.include_router(assets_router)
 
 
 @app.get("/ping")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.services.assets.pipeline import AssetPipeline
+
+router = APIRouter()
+
+@router.api_route("/assets/{name}", methods=["GET", "HEAD"])
+async def get_asset(name: str, request: Request):
+    entry = AssetPipeline.get(name)
+    if entry is None:
+        raise HTTPException(404, f"Asset '{name}' not found")
+
+    # ranges are always served from the identity bytes
+    encoding = None
+    if "range" not in request.headers:
+        encoding = AssetPipeline.pick_encoding(entry, request.headers.get("accept-encoding", ""))
+
+    etag = entry.etag(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return FileResponse(entry.path, media_type=entry.media_type, headers=headers)
+
+    headers["Content-Encoding"] = encoding
+    return FileResponse(entry.variants[encoding], media_type=entry.media_type, headers=headers)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import random
 from pathlib import Path
@@ -7,6 +8,9 @@ from fastapi import APIRouter, HTTPException
 from app.config.settings import settings
 from app.config.models import InitResponse, RawRoom, AgentInfo, Room
 from app.services.manager.manager import GameManager
+from app.services.manager.state import GameState
+from app.services.manager.scheduler import TickScheduler
+from app.services.assets.pipeline import AssetPipeline
 
 router = APIRouter()
 
@@ -22,7 +26,7 @@ async def init_game(map_id: Optional[str] = None) -> InitResponse:
     if not glb_path.exists() or glb_path.suffix.lower() != ".glb":
         raise HTTPException(400, f"Map '{map_id}' not found")
 
-    map_asset = f"/models/{glb_path.name}"
+    map_asset = AssetPipeline.url_for(glb_path, f"/models/{glb_path.name}")
 
     rooms_json = json_dir / glb_path.with_suffix(".json").name
     if not rooms_json.exists():
@@ -32,9 +36,18 @@ async def init_game(map_id: Optional[str] = None) -> InitResponse:
     raw_rooms = [RawRoom(**r) for r in raw.get("rooms", [])]
     rooms: list[Room] = [rr.to_room() for rr in raw_rooms]
 
+    # installing waits for a running step (or a whole /step/batch) to let go of the game, so not on the loop
+    response = await asyncio.to_thread(_start, map_asset, rooms)
+    TickScheduler.touch()
+    return response
+
+
+def _start(map_asset: str, rooms: list[Room]) -> InitResponse:
     GameManager.initialize(map_asset=map_asset, rooms=rooms)
+    return GameManager.read(_init_response)
+
 
-    state = GameManager.get_state()
+def _init_response(state: GameState) -> InitResponse:
     safe = state.evac_zone.id
 
     agents_info: list[AgentInfo] = []
@@ -56,8 +69,8 @@ async def init_game(map_id: Optional[str] = None) -> InitResponse:
 
     return InitResponse(
         tick=state.tick,
-        map_asset=map_asset,
+        map_asset=state.map_asset,
         evac_zone_id=safe,
-        rooms=rooms,
+        rooms=state.rooms,
         agents=agents_info
-    )
\ No newline at end of file
+    )
@@ -1,16 +1,20 @@
 
-from fastapi import APIRouter
-from app.config.models import FullState, AgentInfo
+import asyncio
+from functools import partial
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from app.config.settings import settings
+from app.config.models import FullState, AgentInfo, GridFormat, TileFormat
 from app.services.manager.manager import GameManager
-from typing import cast
+from app.services.manager.state import GameState
+from app.services.manager.scheduler import TickScheduler
+from app.services.utils.tiles import TileGrid, tiles_payload
+from typing import Optional, cast
 from typing import Literal
 
 router = APIRouter()
 
-@router.get("/state", response_model=FullState)
-async def get_full_state():
-    state = GameManager.get_state()
-
+def full_state(state: GameState, tiles_format: Optional[TileFormat]) -> FullState:
     agents = []
     for ag in state.agents.values():
         role_literal = cast(Literal["Survivor", "Infected"], ag.role)
@@ -29,14 +33,43 @@ async def get_full_state():
         ))
 
     map_size = list(state.map_size)
-    tiles = state.tiles
+    tiles_data = tiles_payload(state.tiles, tiles_format)
 
     chat_log = state.chat_log
 
     return FullState(
         tick=state.tick,
         map_size=map_size,
-        tiles=tiles,
+        tiles=tiles_data,
+        tiles_url=f"/tiles/{state.tiles.digest}",
         agents=agents,
         chat_log=chat_log
     )
+
+
+@router.get("/state", response_model=FullState)
+async def get_full_state(tiles: Optional[TileFormat] = None):
+    TickScheduler.touch()
+    # built under the step lock off the loop, so a running step can't tear it
+    return await asyncio.to_thread(GameManager.read, partial(full_state, tiles_format=tiles or settings.TILES_FORMAT))
+
+
+@router.get("/tiles/{digest}")
+async def get_tiles(digest: str, request: Request, format: GridFormat = "rle"):
+    grid = GameManager.get_state().tiles
+    if digest != grid.digest:
+        raise HTTPException(404, "Tiles for this map are no longer loaded")
+
+    etag = f'"{digest}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    # a first encode of a large map takes a noticeable fraction of a second
+    payload = await asyncio.to_thread(_grid_payload, grid, format)
+    return JSONResponse(payload, headers=headers)
+
+
+def _grid_payload(grid: TileGrid, format: GridFormat):
+    payload = tiles_payload(grid, format)
+    return payload if isinstance(payload, list) else payload.model_dump()
@@ -0,0 +1,24 @@
+import time
+from fastapi import APIRouter
+from app.services.llm.llm_service import LLMService
+from app.services.assets.pipeline import AssetPipeline
+from app.services.manager.scheduler import TickScheduler
+from app.services.manager.inbox import ActionInbox
+from app.services.manager.checkpoint import Checkpointer
+from app.services.recording.trajectory import TrajectoryRecorder
+from app.services.utils.profiling import StartupProfile
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_stats():
+    return {
+        "llm": LLMService.stats(),
+        "scheduler": TickScheduler.stats(),
+        "recorder": TrajectoryRecorder.stats(),
+        "inbox": ActionInbox.stats(),
+        "checkpoint": Checkpointer.stats(),
+        "assets": AssetPipeline.stats(),
+        "process": {"cpu_secs": time.process_time()},
+        "startup": StartupProfile.report()
+    }
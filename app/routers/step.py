@@ -1,23 +1,87 @@
+import asyncio
+import json
+from functools import partial
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 from app.config.settings import settings
-from app.config.models import StepRequest, StepResponse, Delta
+from app.config.models import StepRequest, StepResponse, StepBatchRequest, StepBatchResponse, Delta
 from app.services.manager.manager import GameManager
+from app.services.manager.scheduler import TickScheduler
 
 router = APIRouter()
 
 @router.post("/step", response_model=StepResponse)
 async def step_game(request: StepRequest):
+    TickScheduler.touch()
     try:
         ext_actions = request.external_actions or {}
 
         if settings.MODE == "deterministic":
-            delta: Delta = GameManager.step_deterministic(ext_actions)
+            tick, delta = await asyncio.to_thread(GameManager.step_deterministic, ext_actions)
         else:
-            delta: Delta = GameManager.step_rl(ext_actions)
+            tick, delta = await asyncio.to_thread(GameManager.step_rl, ext_actions)
 
-        state = GameManager.get_state()
-        return StepResponse(tick=state.tick, delta=delta)
+        return StepResponse(tick=tick, delta=delta)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/step/batch", response_model=StepBatchResponse)
+async def step_batch(request: StepBatchRequest):
+    TickScheduler.touch()
+    if request.ticks > settings.STEP_BATCH_MAX_TICKS:
+        raise HTTPException(status_code=422, detail=f"at most {settings.STEP_BATCH_MAX_TICKS} ticks per batch")
+    try:
+        last_tick = GameManager.get_state().tick
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    run = partial(GameManager.step_many, request.ticks, request.actions, request.use_llm, request.stop_on_win)
+
+    if request.stream:
+        loop = asyncio.get_running_loop()
+        lines: asyncio.Queue = asyncio.Queue()
+
+        def emit(tick: int, delta: Delta) -> None:
+            nonlocal last_tick
+            last_tick = tick
+            # serialized on the stepping thread, the event loop only forwards bytes
+            line = StepResponse(tick=tick, delta=delta).model_dump_json() + "\n"
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+
+        async def ndjson():
+            worker = asyncio.ensure_future(asyncio.to_thread(run, on_step=emit))
+            worker.add_done_callback(lambda _: lines.put_nowait(None))
+            while (line := await lines.get()) is not None:
+                yield line
+            try:
+                summary = {"done": True, "tick": last_tick, "ticks": worker.result()}
+            except Exception as e:
+                summary = {"done": False, "error": str(e)}
+            yield json.dumps(summary) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    merged = Delta()
+    steps = []
+
+    def collect(tick: int, delta: Delta) -> None:
+        nonlocal last_tick
+        last_tick = tick
+        if request.merge:
+            merged.merge(delta)
+        else:
+            steps.append(StepResponse(tick=tick, delta=delta))
+
+    try:
+        ticks = await asyncio.to_thread(run, on_step=collect)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StepBatchResponse(
+        tick=last_tick,
+        ticks=ticks,
+        delta=merged if request.merge else None,
+        steps=None if request.merge else steps
+    )
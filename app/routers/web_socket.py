@@ -1,7 +1,13 @@
-from typing import Dict, Any, Literal, cast
+import asyncio
+from functools import partial
+from typing import Dict, Any
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.config.settings import settings
 from app.services.manager.manager import GameManager
-from app.config.models import FullState, AgentInfo
+from app.services.manager.inbox import ActionInbox
+from app.services.manager.scheduler import TickScheduler
+from app.services.utils.tiles import TILE_FORMATS
+from app.routers.state import full_state
 router = APIRouter()
 _clients: list[WebSocket] = []
 
@@ -9,44 +15,39 @@ _clients: list[WebSocket] = []
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
     _clients.append(ws)
+    TickScheduler.touch()
 
-    state = GameManager.get_state()
-    full_agents = []
-    for ag in state.agents.values():
-        role_literal = cast(Literal["Survivor", "Infected"], ag.role)
-        full_agents.append(AgentInfo(
-            id=ag.id,
-            role=role_literal,
-            is_knower=ag.is_knower,
-            known_target=ag.known_target,
-            alive=ag.alive,
-            position=list(ag.position),
-            heading=ag.heading,
-            kill_cooldown=ag.kill_cooldown,
-            vote_cooldown=ag.vote_cooldown,
-            chat_cooldown=ag.chat_cooldown,
-            trust=ag.trust
-        ))
+    # tiles are fetched once per map from tiles_url unless the client opts in with ?tiles=<format>
+    tiles_format = ws.query_params.get("tiles", settings.WS_TILES_FORMAT)
+    if tiles_format not in TILE_FORMATS:
+        tiles_format = settings.WS_TILES_FORMAT
 
-    full = FullState(
-        tick=state.tick,
-        map_size=list(state.map_size),
-        tiles=state.tiles,
-        agents=full_agents,
-        chat_log=state.chat_log
-    )
+    full = await asyncio.to_thread(GameManager.read, partial(full_state, tiles_format=tiles_format))
     await ws.send_json({"full_state": full.model_dump()})
 
     try:
         while True:
             msg: Dict[str, Any] = await ws.receive_json()
-            if "external_actions" in msg:
-                delta = GameManager.step_deterministic(msg["external_actions"])
-                resp = {"tick": GameManager.get_state().tick, "delta": delta.model_dump()}
-                await ws.send_json(resp)
+            if "ping" in msg:
+                # echoed untouched so clients can time round trips on their own clock
+                await ws.send_json({"pong": msg["ping"]})
+            elif "external_actions" in msg:
+                TickScheduler.touch()
+                state = GameManager.get_state()
+                ack = ActionInbox.submit(msg["external_actions"], state.agents, state.tick)
+                if settings.ENABLE_AUTO_TICK and settings.MODE == "deterministic":
+                    # applied by the next scheduled tick, whatever the client message rate
+                    await ws.send_json({"ack": ack})
+                else:
+                    tick, delta = await asyncio.to_thread(GameManager.step_deterministic, {})
+                    resp = {"tick": tick, "delta": delta.model_dump(), "ack": ack}
+                    await ws.send_json(resp)
     except WebSocketDisconnect:
         _clients.remove(ws)
 
+def subscriber_count() -> int:
+    return len(_clients)
+
 async def broadcast(delta_json: Dict[str, Any]):
     dead = []
     for ws in _clients:
@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import mimetypes
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.config.settings import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+mimetypes.add_type("model/gltf-binary", ".glb")
+
+
+@dataclass
+class AssetEntry:
+    name: str
+    path: Path
+    digest: str
+    media_type: str
+    size: int
+    variants: Dict[str, Path] = field(default_factory=dict)
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # each representation gets its own strong validator
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+class AssetPipeline:
+    _entries: Dict[str, AssetEntry] = {}
+    _urls: Dict[Path, str] = {}
+    _stop = threading.Event()
+    _ready = False
+    _build_ms = 0.0
+    _error: Optional[str] = None
+
+    @classmethod
+    def build(cls) -> None:
+        # runs as a background task; whatever fails, /init falls back to plain URLs and shutdown stays clean
+        try:
+            cls._build()
+        except Exception as e:
+            cls._error = str(e)
+            print(f"⚠️ Asset pipeline stopped: {e}")
+
+    @classmethod
+    def _build(cls) -> None:
+        started = time.perf_counter()
+        entries: Dict[str, AssetEntry] = {}
+        urls: Dict[Path, str] = {}
+        for src_dir, pattern in ((settings.MODELS_DIR, "*.glb"), (settings.JSON_DIR, "*.json")):
+            directory = Path(src_dir)
+            if not directory.is_dir():
+                continue
+            for path in sorted(directory.glob(pattern)):
+                try:
+                    entry = cls._index_one(path)
+                except OSError as e:
+                    print(f"⚠️ {path} is not served from /assets: {e}")
+                    continue
+                entries[entry.name] = entry
+                urls[path.resolve()] = f"/assets/{entry.name}"
+
+        # hashed names are served (identity bytes only) before any variant exists
+        cls._entries = entries
+        cls._urls = urls
+
+        cache_dir = Path(settings.ASSET_CACHE_DIR)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for entry in entries.values():
+            if cls._stop.is_set():
+                return
+            try:
+                cls._compress(entry, cache_dir)
+            except OSError as e:
+                print(f"⚠️ {entry.name} is served uncompressed: {e}")
+        cls._ready = True
+        cls._build_ms = (time.perf_counter() - started) * 1000
+
+    @classmethod
+    def stop(cls) -> None:
+        # lets a shutdown during the first build wait for one variant at most
+        cls._stop.set()
+
+    @classmethod
+    def _index_one(cls, path: Path) -> AssetEntry:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        return AssetEntry(
+            name=f"{path.stem}.{digest}{path.suffix}",
+            path=path,
+            digest=digest,
+            media_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+            size=len(data)
+        )
+
+    @classmethod
+    def _compress(cls, entry: AssetEntry, cache_dir: Path) -> None:
+        if entry.size < settings.ASSET_MIN_COMPRESS_BYTES:
+            return
+
+        data = entry.path.read_bytes()
+        encoders = [("gzip", ".gz", lambda b: gzip.compress(b, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(("br", ".br", lambda b: brotli.compress(b, quality=11)))
+        for encoding, suffix, encode in encoders:
+            if cls._stop.is_set():
+                return
+            # hashed names make variants from a previous start reusable as-is
+            target = cache_dir / (entry.name + suffix)
+            if not target.exists():
+                packed = encode(data)
+                if len(packed) >= len(data):
+                    continue
+                tmp = target.with_suffix(target.suffix + ".tmp")
+                tmp.write_bytes(packed)
+                tmp.replace(target)
+            # published one at a time; requests pick it up from their next lookup
+            entry.variants[encoding] = target
+
+    @classmethod
+    def get(cls, name: str) -> Optional[AssetEntry]:
+        return cls._entries.get(name)
+
+    @classmethod
+    def url_for(cls, path: Path, default: str) -> str:
+        return cls._urls.get(path.resolve(), default)
+
+    @classmethod
+    def pick_encoding(cls, entry: AssetEntry, accept_encoding: str) -> Optional[str]:
+        accepted: List[str] = []
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.append(token.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in entry.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return None
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "assets": len(cls._entries),
+            "variants": sum(len(e.variants) for e in cls._entries.values()),
+            "ready": cls._ready,
+            "build_ms": round(cls._build_ms, 2),
+            "error": cls._error,
+        }
@@ -0,0 +1,45 @@
+import random
+from typing import Dict, List, Optional
+from app.services.manager.state import AgentState, GameState
+
+
+class _Slots(dict):
+    def __missing__(self, key: str) -> str:
+        return "someone"
+
+
+class FallbackGenerator:
+    def __init__(self, prompts: dict):
+        self._templates: Dict[str, Dict[str, List[str]]] = {
+            role: data.get("templates", {}) for role, data in prompts["roles"].items()
+        }
+        self._knower: Dict[str, List[str]] = (
+            prompts["modifiers"].get("Knower", {}).get("templates", {})
+        )
+
+    def _pick(self, agent: AgentState, situation: str) -> Optional[str]:
+        if agent.is_knower and agent.known_target:
+            extra = self._knower.get(situation)
+            if extra and random.random() < 0.5:
+                return random.choice(extra)
+        templates = self._templates.get(agent.role, {})
+        options = templates.get(situation) or templates.get("chat")
+        return random.choice(options) if options else None
+
+    def generate(self, agent: AgentState, visible: List[AgentState], state: GameState,
+                 situation: str, suspect: Optional[str] = None) -> str:
+        template = self._pick(agent, situation)
+        if template is None:
+            return "..."
+        if suspect is None:
+            candidates = [(t, oid) for oid, t in agent.trust.items() if oid != agent.id]
+            if candidates:
+                suspect = min(candidates)[1]
+        slots = _Slots()
+        if suspect:
+            slots["suspect"] = suspect
+        if visible:
+            slots["near"] = visible[0].id
+        if agent.known_target:
+            slots["target"] = agent.known_target
+        return template.format_map(slots)
@@ -1,92 +1,379 @@
 import json
+import re
 import threading
-from typing import List
-from cachetools import TTLCache, cached
-import ollama
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeout
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
 from app.config.settings import settings
 from app.services.manager.state import AgentState, GameState
+from .fallback import FallbackGenerator
+from .pregen import PregenJob, PregenPool, likely_situations
+from .prompt import PromptBuilder, PromptStats
+
+_SPEAKER_RE = re.compile(r"^[\s*\-]*([\w-]+)\s*:\s*(.+)$")
+
+
+class _Stream:
+    __slots__ = ("id", "head", "open", "started", "_sink")
+
+    def __init__(self, sid: str, head: dict, sink: Callable[[dict], None]):
+        self.id = sid
+        self.head = head
+        self.open = True
+        self.started = False
+        self._sink = sink
+
+    def push(self, piece: str) -> None:
+        # tokens arriving after the tick gave up on this line are not shown
+        if self.open:
+            self.started = True
+            self._sink({"chat_stream": {"id": self.id, **self.head, "text": piece}})
 
 
 class LLMService:
-    _lock = threading.Lock()
-    _cache: TTLCache
+    _state_lock = threading.Lock()
+    _init_lock = threading.Lock()
+    _ready: bool = False
+    _cache: Any = None
     _prompts: dict
+    _builder: PromptBuilder
+    _spec_prompts: PromptStats
+    _fallback: FallbackGenerator
+    _pregen: Optional[PregenPool] = None
+    _speculative: Optional[Future] = None
+    _client: Any = None
+    _stream_sink: Optional[Callable[[dict], None]] = None
+    _stream_seq: int = 0
+    _pending: int = 0
+    _tick_deadline: float = 0.0
+    _down_until: float = 0.0
+    _offline: bool = False
+    _counters: Dict[str, int] = {}
 
     @classmethod
     def initialize(cls):
-        cls._cache = TTLCache(maxsize=1000, ttl=settings.LLM_CACHE_TTL)
+        with cls._init_lock:
+            if not cls._ready:
+                cls._load()
+                cls._ready = True
 
+    @classmethod
+    def _load(cls):
         path = Path(__file__).parent / "roles.json"
         with path.open(encoding="utf-8") as f:
             cls._prompts = json.load(f)
+        cls._builder = PromptBuilder(cls._prompts)
+        cls._spec_prompts = PromptStats()
+        cls._fallback = FallbackGenerator(cls._prompts)
+
+        cls._pending = 0
+        cls._down_until = 0.0
+        cls._counters = {
+            "model": 0,
+            "cache": 0,
+            "fallback": 0,
+            "fallback_timeout": 0,
+            "fallback_busy": 0,
+            "fallback_unavailable": 0,
+            "fallback_offline": 0,
+            "pregen": 0,
+            "pregen_cancelled": 0,
+        }
+        if settings.LLM_BACKEND != "ollama":
+            return
+
+        # the model client stack is the slowest import of the app, load it only when used
+        from cachetools import TTLCache
+        from .ollama_client import AsyncOllamaClient
+
+        cls._cache = TTLCache(maxsize=1000, ttl=settings.LLM_CACHE_TTL)
+        cls._client = AsyncOllamaClient(
+            settings.OLLAMA_HOST,
+            settings.LLM_MODEL,
+            concurrency=settings.LLM_CONCURRENCY,
+            timeout=settings.LLM_REQUEST_TIMEOUT
+        )
+        if settings.LLM_PREGEN_ENABLED and cls._pregen is None:
+            cls._pregen = PregenPool(cls._complete_idle, cls._is_idle)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return settings.LLM_BACKEND != "none"
 
     @classmethod
-    def _build_prompt(cls, agent: AgentState, visible: List[AgentState], state: GameState) -> str:
-        role_data = cls._prompts["roles"].get(agent.role, {})
-        system_parts = [role_data.get("system", "")]
+    def set_stream_sink(cls, sink: Optional[Callable[[dict], None]]) -> None:
+        # the sink is called from the HTTP client thread and must hand events over thread-safely
+        cls._stream_sink = sink
 
-        if agent.is_knower:
-            mod = cls._prompts["modifiers"].get("Knower", {})
-            system_parts.append(mod.get("system", ""))
+    @classmethod
+    def _open_stream(cls, agent: AgentState, visible: List[AgentState], state: GameState) -> Optional[_Stream]:
+        if cls._stream_sink is None or cls._client is None:
+            return None
+        with cls._state_lock:
+            cls._stream_seq += 1
+            sid = f"s{cls._stream_seq}"
+        head = {"from": agent.id, "to": [v.id for v in visible], "tick": state.tick}
+        return _Stream(sid, head, cls._stream_sink)
 
-        system = " ".join(p for p in system_parts if p)
+    @classmethod
+    def begin_tick(cls, offline: bool = False) -> None:
+        if cls.enabled() and not cls._ready:
+            cls.initialize()
+        cls._offline = offline
+        # all model calls made during one tick share this deadline, so the tick keeps its cadence
+        cls._tick_deadline = time.monotonic() + settings.TICK_DURATION * settings.LLM_DEADLINE_FRACTION
 
-        vis_ids = [v.id for v in visible]
-        recent = state.chat_log[-5:]
-        vs = state.vote_session
-        vote_part = ""
-        if vs and agent.alive and agent.id in vs.votes:
-            vote_part = (
-                f"A vote is in progress for suspect {vs.suspect_id}. "
-                f"Time left: {vs.timer * settings.TICK_DURATION:.1f}s. "
-                "Discuss your view."
+    @classmethod
+    def _count(cls, key: str) -> None:
+        with cls._state_lock:
+            cls._counters[key] = cls._counters.get(key, 0) + 1
+
+    @classmethod
+    def _build_prompt(cls, agent: AgentState, visible: List[AgentState], state: GameState,
+                      situation: str = "chat", suspect: Optional[str] = None,
+                      stats: Optional[PromptStats] = None) -> tuple[str, str]:
+        if suspect is not None:
+            vs = state.vote_sessions.get(suspect)
+        else:
+            vs = next((v for v in state.vote_sessions.values() if agent.id in v.votes), None)
+        extra = ""
+        if vs and agent.alive:
+            extra = (
+                f"Vote on {vs.suspect_id}, "
+                f"{vs.timer * settings.TICK_DURATION:.0f}s left. Discuss."
             )
+        elif situation == "corpse":
+            extra = "A body lies nearby."
+        elif situation == "group":
+            extra = "A group has gathered around you."
 
-        return (
-            f"SYSTEM: {system}\n"
-            f"{vote_part}\n"
-            f"You are agent {agent.id} ({agent.role}{', knower' if agent.is_knower else ''}).\n"
-            f"Visible agents: {', '.join(vis_ids)}.\n"
-            f"Known target: {agent.known_target}.\n"
-            f"Trust levels: {agent.trust}.\n"
-            f"Recent chat: {recent}.\n"
-            "USER: Generate a brief in-character message."
+        return cls._builder.build(
+            agent, visible, state,
+            task="Say one brief in-character line.",
+            extra=extra,
+            stats=stats
         )
 
+    @classmethod
+    def _on_done(cls, key: tuple[str, str], future: Future) -> None:
+        with cls._state_lock:
+            cls._pending -= 1
+            if future.exception() is None:
+                # late answers still warm the cache for the next identical prompt
+                cls._cache[key] = future.result().strip()
 
     @classmethod
-    def generate_thought(cls, agent: AgentState, visible_agents: List[AgentState], state: GameState) -> str:
-        prompt = (
-            "SYSTEM: Think step-by-step, do not reveal hidden roles.\n"
-            f"You are {agent.role} {agent.id}.\n"
-            f"Visible: {', '.join(v.id for v in visible_agents)}\n"
-            f"Known target: {agent.known_target}\n"
-            f"Trust: {agent.trust}\n"
-            f"Last 3 chat: {state.chat_log[-3:]}\n"
-            "Thought:"
-        )
+    def _is_idle(cls) -> bool:
+        return cls._pending == 0 and cls._client.in_flight < cls._client.concurrency \
+            and time.monotonic() >= cls._down_until
 
     @classmethod
-    def generate(cls, agent: AgentState, visible_agents: List[AgentState], state: GameState) -> dict:
-        prompt = cls._build_prompt(agent, visible_agents, state)
+    def _complete_idle(cls, system: str, user: str) -> Optional[str]:
+        future = cls._client.submit(system, user, settings.LLM_MAX_TOKENS)
+        with cls._state_lock:
+            cls._speculative = future
+        try:
+            text = future.result(timeout=settings.LLM_REQUEST_TIMEOUT).strip()
+        except CancelledError:
+            cls._count("pregen_cancelled")
+            return None
+        except Exception:
+            cls._down_until = time.monotonic() + settings.LLM_RETRY_SECS
+            return None
+        finally:
+            with cls._state_lock:
+                cls._speculative = None
+        with cls._state_lock:
+            cls._cache[(system, user)] = text
+        return text or None
 
-        @cached(cls._cache)
-        def _call_ollama(p: str) -> str:
-            with cls._lock:
-                resp = ollama.chat(
-                    model=settings.LLM_MODEL,
-                    messages=[{"role": "user", "content": p}],
-                    options={"max_tokens": settings.LLM_MAX_TOKENS}
-                )
-                if "message" in resp:
-                    return resp["message"]["content"]
-                return resp["choices"][0]["message"]["content"]
+    @classmethod
+    def speculate(cls, state: GameState) -> None:
+        if cls._pregen is None:
+            return
+        jobs = []
+        for ag, situation, suspect, visible in likely_situations(state):
+            if len(jobs) >= settings.LLM_PREGEN_MAX_PER_TICK:
+                break
+            # prompts are only built for lines that are neither queued nor ready yet
+            if not cls._pregen.wants(ag.id, situation, suspect):
+                continue
+            system, user = cls._build_prompt(ag, visible, state, situation, suspect, cls._spec_prompts)
+            jobs.append(PregenJob(
+                agent_id=ag.id,
+                situation=situation,
+                suspect=suspect,
+                system=system,
+                user=user,
+                tick=state.tick
+            ))
+        cls._pregen.submit(jobs, state.tick)
 
-        text = _call_ollama(prompt).strip()
-        return {
+    @classmethod
+    def _call(cls, system: str, user: str, max_tokens: int = settings.LLM_MAX_TOKENS,
+              stream: Optional[_Stream] = None) -> Optional[str]:
+        key = (system, user)
+        with cls._state_lock:
+            text = cls._cache.get(key)
+        if text:
+            cls._count("cache")
+            return text
+
+        now = time.monotonic()
+        if now < cls._down_until:
+            cls._count("fallback_unavailable")
+            return None
+        if cls._pending >= settings.LLM_MAX_PENDING:
+            cls._count("fallback_busy")
+            return None
+
+        budget = settings.TICK_DURATION * settings.LLM_DEADLINE_FRACTION
+        remaining = min(budget, cls._tick_deadline - now) if cls._tick_deadline else budget
+        if remaining <= 0:
+            cls._count("fallback_timeout")
+            return None
+
+        with cls._state_lock:
+            cls._pending += 1
+            speculative = cls._speculative
+        if speculative is not None and cls._client.in_flight >= cls._client.concurrency:
+            # the tick path never queues behind a speculative line
+            speculative.cancel()
+        future = cls._client.submit(system, user, max_tokens, stream.push if stream is not None else None)
+        future.add_done_callback(partial(cls._on_done, key))
+        try:
+            text = future.result(timeout=remaining).strip()
+        except FutureTimeout:
+            cls._count("fallback_timeout")
+            return None
+        except Exception:
+            cls._down_until = time.monotonic() + settings.LLM_RETRY_SECS
+            cls._count("fallback_unavailable")
+            return None
+        finally:
+            if stream is not None:
+                stream.open = False
+
+        cls._count("model")
+        return text or None
+
+    @classmethod
+    def _uses_model(cls) -> bool:
+        if cls._client is None:
+            return False
+        if cls._offline:
+            cls._count("fallback_offline")
+            return False
+        return True
+
+    @classmethod
+    def _complete(cls, prompt: Callable[[], tuple[str, str]], agent: AgentState, visible: List[AgentState],
+                  state: GameState, situation: str, suspect: Optional[str] = None,
+                  stream: Optional[_Stream] = None) -> str:
+        # prompts are only rendered when a model will actually read them
+        text = cls._call(*prompt(), stream=stream) if cls._uses_model() else None
+        if text is None:
+            cls._count("fallback")
+            text = cls._fallback.generate(agent, visible, state, situation, suspect)
+        return text
+
+    @classmethod
+    def stats(cls) -> dict:
+        if not cls._ready:
+            return {"backend": settings.LLM_BACKEND, "loaded": False}
+        with cls._state_lock:
+            calls = dict(cls._counters)
+            calls["pending"] = cls._pending
+        out = {
+            "backend": settings.LLM_BACKEND,
+            "loaded": True,
+            "prompt": cls._builder.stats.as_dict(),
+            "prompt_speculative": cls._spec_prompts.as_dict(),
+            "calls": calls
+        }
+        if cls._client is not None:
+            out["client"] = cls._client.stats()
+        if cls._pregen is not None:
+            out["pregen"] = cls._pregen.stats()
+        return out
+
+    @classmethod
+    def generate_thought(cls, agent: AgentState, visible_agents: List[AgentState], state: GameState) -> Optional[str]:
+        if not cls.enabled():
+            return None
+        return cls._complete(
+            lambda: cls._builder.build(
+                agent, visible_agents, state,
+                task="Think step-by-step, do not reveal hidden roles. Thought:"
+            ),
+            agent, visible_agents, state, "thought"
+        )
+
+    @classmethod
+    def generate(cls, agent: AgentState, visible_agents: List[AgentState], state: GameState,
+                 situation: str = "chat", suspect: Optional[str] = None) -> Optional[dict]:
+        if not cls.enabled():
+            return None
+        text = None
+        stream = None
+        if cls._pregen is not None:
+            text = cls._pregen.take(agent.id, situation, suspect, state.tick)
+        if text is not None:
+            cls._count("pregen")
+        else:
+            stream = cls._open_stream(agent, visible_agents, state)
+            text = cls._complete(
+                lambda: cls._build_prompt(agent, visible_agents, state, situation, suspect),
+                agent, visible_agents, state, situation, suspect, stream
+            )
+        msg = {
             "from": agent.id,
             "text": text,
             "to": [v.id for v in visible_agents],
             "tick": state.tick
-        }
\ No newline at end of file
+        }
+        if stream is not None and stream.started:
+            # the final text replaces whatever was streamed under this id
+            msg["stream_id"] = stream.id
+        return msg
+
+    @classmethod
+    def generate_discussion(cls, speakers: List[AgentState], suspect: AgentState, state: GameState) -> List[dict]:
+        if not cls.enabled():
+            return []
+        lines: Dict[str, str] = {}
+        pending: List[AgentState] = []
+        for ag in speakers:
+            text = cls._pregen.take(ag.id, "vote", suspect.id, state.tick) if cls._pregen is not None else None
+            if text is not None:
+                cls._count("pregen")
+                lines[ag.id] = text
+            else:
+                pending.append(ag)
+
+        if pending:
+            text = None
+            if cls._uses_model():
+                system, user = cls._builder.discussion(pending, suspect, state.vote_sessions.get(suspect.id), state)
+                text = cls._call(system, user, settings.LLM_MAX_TOKENS * len(pending))
+            wanted = {ag.id for ag in pending}
+            for raw in (text or "").splitlines():
+                m = _SPEAKER_RE.match(raw)
+                if m and m.group(1) in wanted and m.group(1) not in lines:
+                    lines[m.group(1)] = m.group(2).strip()
+            for ag in pending:
+                if ag.id not in lines:
+                    cls._count("fallback")
+                    lines[ag.id] = cls._fallback.generate(ag, [suspect], state, "vote", suspect.id)
+
+        return [
+            {
+                "from": ag.id,
+                "text": lines[ag.id],
+                "to": [suspect.id],
+                "tick": state.tick
+            }
+            for ag in speakers
+        ]
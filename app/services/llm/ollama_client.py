@@ -0,0 +1,83 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+import httpx
+
+TokenSink = Callable[[str], None]
+
+_KEEPALIVE_SECS = 60.0
+
+
+class AsyncOllamaClient:
+    # one background event loop owns the pooled connections; callers on any thread get a Future
+    def __init__(self, host: str, model: str, concurrency: int, timeout: float):
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.in_flight = 0
+        self.streamed_tokens = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-http", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(host, timeout), self._loop).result()
+
+    async def _open(self, host: str, timeout: float) -> None:
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=host,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+                keepalive_expiry=_KEEPALIVE_SECS
+            )
+        )
+
+    def submit(self, system: str, user: str, max_tokens: int, on_token: Optional[TokenSink] = None) -> Future:
+        return asyncio.run_coroutine_threadsafe(self.chat(system, user, max_tokens, on_token), self._loop)
+
+    async def chat(self, system: str, user: str, max_tokens: int, on_token: Optional[TokenSink] = None) -> str:
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            "stream": True,
+            "options": {"num_predict": max_tokens}
+        }
+        parts = []
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                async with self._http.stream("POST", "/api/chat", json=body) as resp:
+                    resp.raise_for_status()
+                    # read to the end of the body (past the "done" chunk) so the connection goes back to the pool
+                    async for line in resp.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise RuntimeError(chunk["error"])
+                        piece = chunk.get("message", {}).get("content", "")
+                        if piece:
+                            parts.append(piece)
+                            self.streamed_tokens += 1
+                            if on_token is not None:
+                                on_token(piece)
+            finally:
+                self.in_flight -= 1
+        return "".join(parts)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "streamed_tokens": self.streamed_tokens,
+        }
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._http.aclose(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from math import hypot
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.services.manager.state import AgentState, GameState
+
+
+@dataclass
+class PregenJob:
+    agent_id: str
+    situation: str
+    suspect: Optional[str]
+    system: str
+    user: str
+    tick: int
+
+
+_PRIORITY = {"vote": 0, "corpse": 1, "group": 2}
+
+
+@dataclass
+class _ReadyLine:
+    situation: str
+    suspect: Optional[str]
+    text: str
+    expires: int
+
+
+def _near(state: GameState, ag: AgentState, radius: float) -> List[AgentState]:
+    x, y = ag.position
+    out = []
+    for oid in state.grid.near(ag.position, radius):
+        o = state.agents[oid]
+        if o.alive and oid != ag.id and hypot(o.position[0] - x, o.position[1] - y) <= radius:
+            out.append(o)
+    return out
+
+
+def likely_situations(state: GameState) -> List[Tuple[AgentState, str, Optional[str], List[AgentState]]]:
+    horizon = settings.LLM_PREGEN_HORIZON_TICKS
+    out = []
+    for ag in state.agents.values():
+        if not ag.alive:
+            continue
+        if ag.chat_cooldown > horizon:
+            continue
+        x, y = ag.position
+
+        # process_votes walks sessions in order and lets each listed voter speak once its cooldown
+        # allows, so the first session naming this agent is the one it will be asked about
+        vs = next((v for v in state.vote_sessions.values() if ag.id in v.votes), None)
+        if vs:
+            out.append((ag, "vote", vs.suspect_id, [state.agents[vs.suspect_id]]))
+            continue
+
+        # bot_ai chats on any corpse within this range
+        if any(hypot(c[0] - x, c[1] - y) <= settings.HEAR_RADIUS * 3 for c in state.corpses):
+            out.append((ag, "corpse", None, _near(state, ag, settings.FOV_DISTANCE)))
+            continue
+
+        # only agents a step or two from forming a group, a loose crowd rarely becomes one
+        if ag.id not in state.group_member:
+            near = _near(state, ag, settings.GROUP_CHAT_RADIUS + settings.LLM_PREGEN_GROUP_MARGIN)
+            if len(near) + 1 >= settings.GROUP_CHAT_MIN:
+                out.append((ag, "group", None, near))
+    out.sort(key=lambda s: _PRIORITY[s[1]])
+    return out
+
+
+class PregenPool:
+    def __init__(self, complete: Callable[[str, str], Optional[str]], is_idle: Callable[[], bool]):
+        self._complete = complete
+        self._is_idle = is_idle
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._jobs: "OrderedDict[Tuple[str, str], PregenJob]" = OrderedDict()
+        self._ready: Dict[str, Deque[_ReadyLine]] = {}
+        self._tick = 0
+        self.hits = 0
+        self.generated = 0
+        self.stale = 0
+        self._thread = threading.Thread(target=self._run, name="llm-pregen", daemon=True)
+        self._thread.start()
+
+    def _has_ready(self, agent_id: str, situation: str, suspect: Optional[str]) -> bool:
+        return any(
+            line.situation == situation and line.suspect == suspect
+            for line in self._ready.get(agent_id, ())
+        )
+
+    def wants(self, agent_id: str, situation: str, suspect: Optional[str]) -> bool:
+        with self._lock:
+            return (agent_id, situation) not in self._jobs and not self._has_ready(agent_id, situation, suspect)
+
+    def submit(self, jobs: List[PregenJob], tick: int) -> None:
+        with self._lock:
+            self._tick = tick
+            for job in jobs:
+                key = (job.agent_id, job.situation)
+                if key in self._jobs or self._has_ready(job.agent_id, job.situation, job.suspect):
+                    continue
+                self._jobs[key] = job
+            while len(self._jobs) > settings.LLM_PREGEN_MAX_JOBS:
+                self._jobs.popitem(last=False)
+            if self._jobs:
+                self._wake.set()
+
+    def take(self, agent_id: str, situation: str, suspect: Optional[str], tick: int) -> Optional[str]:
+        with self._lock:
+            queue = self._ready.get(agent_id)
+            if not queue:
+                return None
+            for line in list(queue):
+                if line.expires < tick:
+                    queue.remove(line)
+                    self.stale += 1
+                elif line.situation == situation and line.suspect == suspect:
+                    queue.remove(line)
+                    self.hits += 1
+                    return line.text
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": len(self._jobs),
+                "ready": sum(len(q) for q in self._ready.values()),
+                "generated": self.generated,
+                "hits": self.hits,
+                "stale": self.stale,
+            }
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            # only use capacity the tick path is not waiting on
+            if not self._is_idle():
+                time.sleep(settings.TICK_DURATION / 4)
+                continue
+            with self._lock:
+                if not self._jobs:
+                    self._wake.clear()
+                    continue
+                _, job = self._jobs.popitem(last=False)
+                if job.tick + settings.LLM_PREGEN_HORIZON_TICKS < self._tick:
+                    self.stale += 1
+                    continue
+
+            text = self._complete(job.system, job.user)
+            if not text:
+                continue
+            with self._lock:
+                queue = self._ready.setdefault(job.agent_id, deque(maxlen=settings.LLM_PREGEN_QUEUE_SIZE))
+                queue.append(_ReadyLine(
+                    situation=job.situation,
+                    suspect=job.suspect,
+                    text=text,
+                    expires=job.tick + settings.LLM_PREGEN_HORIZON_TICKS * 2
+                ))
+                self.generated += 1
@@ -0,0 +1,162 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.services.manager.state import AgentState, GameState, VoteSession
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def summarize_chat(entry: Dict) -> Optional[str]:
+    if "text" in entry:
+        return f"{entry.get('from', '?')}: {entry['text']}"
+    system = entry.get("system")
+    if system is None:
+        # private thoughts of other agents never enter prompts
+        return None
+    suspect = entry.get("suspect")
+    if system == "vote_result":
+        return f"[vote {suspect} {entry.get('result')}]"
+    if suspect:
+        return f"[{system} {suspect}]"
+    return f"[{system}]"
+
+
+class PromptStats:
+    def __init__(self):
+        self.count = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.last_tokens = 0
+        self.truncated = 0
+
+    def record(self, tokens: int, truncated: bool) -> None:
+        self.count += 1
+        self.total_tokens += tokens
+        self.max_tokens = max(self.max_tokens, tokens)
+        self.last_tokens = tokens
+        if truncated:
+            self.truncated += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_tokens": round(self.total_tokens / self.count, 1) if self.count else 0.0,
+            "max_tokens": self.max_tokens,
+            "last_tokens": self.last_tokens,
+            "truncated": self.truncated,
+            "budget": settings.LLM_PROMPT_TOKEN_BUDGET,
+        }
+
+
+class PromptBuilder:
+    def __init__(self, prompts: dict):
+        self._prompts = prompts
+        self._prefixes: Dict[Tuple[str, bool], Tuple[str, int]] = {}
+        self.stats = PromptStats()
+
+    def system_prefix(self, agent: AgentState) -> Tuple[str, int]:
+        # identical per (role, knower) so the backend can reuse the evaluated prefix across calls
+        key = (agent.role, agent.is_knower)
+        cached = self._prefixes.get(key)
+        if cached is None:
+            role_data = self._prompts["roles"].get(agent.role, {})
+            parts = [role_data.get("system", "")]
+            if agent.is_knower:
+                mod = self._prompts["modifiers"].get("Knower", {})
+                parts.append(mod.get("system", ""))
+            text = " ".join(p for p in parts if p)
+            cached = (text, estimate_tokens(text))
+            self._prefixes[key] = cached
+        return cached
+
+    def suspects(self, agent: AgentState, state: GameState, k: int) -> List[str]:
+        ranked = sorted(
+            (
+                (t, oid) for oid, t in agent.trust.items()
+                if t < 0.5 and oid in state.agents and state.agents[oid].alive
+            )
+        )
+        return [f"{oid} {t:.2f}" for t, oid in ranked[:k]]
+
+    def chat_lines(self, state: GameState, n: int) -> List[str]:
+        lines: List[str] = []
+        for entry in reversed(state.chat_log):
+            if len(lines) >= n:
+                break
+            line = summarize_chat(entry)
+            if line:
+                lines.append(line[:settings.LLM_PROMPT_CHAT_CHARS])
+        lines.reverse()
+        return lines
+
+    def _render(self, head: List[str], suspects: List[str], chat: List[str], task: str) -> str:
+        parts = list(head)
+        if suspects:
+            parts.append("Suspects: " + ", ".join(suspects) + ".")
+        if chat:
+            parts.append("Recent: " + " | ".join(chat))
+        parts.append(task)
+        return "\n".join(parts)
+
+    def build(self, agent: AgentState, visible: List[AgentState], state: GameState,
+              task: str, extra: str = "", stats: Optional[PromptStats] = None) -> Tuple[str, str]:
+        system, system_tokens = self.system_prefix(agent)
+        budget = settings.LLM_PROMPT_TOKEN_BUDGET - system_tokens
+
+        head = [f"You are {agent.id}."]
+        if extra:
+            head.append(extra)
+        if visible:
+            head.append("Near: " + ", ".join(v.id for v in visible) + ".")
+        if agent.known_target:
+            head.append(f"You know the role of {agent.known_target}.")
+
+        suspects = self.suspects(agent, state, settings.LLM_PROMPT_TOP_SUSPECTS)
+        chat = self.chat_lines(state, settings.LLM_PROMPT_CHAT_LINES)
+
+        user = self._render(head, suspects, chat, task)
+        tokens = estimate_tokens(user)
+        truncated = False
+        # drop oldest chat first, then the least suspicious agents
+        while tokens > budget and (chat or suspects):
+            truncated = True
+            if chat:
+                chat.pop(0)
+            else:
+                suspects.pop()
+            user = self._render(head, suspects, chat, task)
+            tokens = estimate_tokens(user)
+
+        (stats or self.stats).record(system_tokens + tokens, truncated)
+        return system, user
+
+    def discussion(self, speakers: List[AgentState], suspect: AgentState,
+                   vs: Optional[VoteSession], state: GameState) -> Tuple[str, str]:
+        system = self._prompts.get("discussion", {}).get("system", "")
+        system_tokens = estimate_tokens(system)
+        budget = settings.LLM_PROMPT_TOKEN_BUDGET * len(speakers) - system_tokens
+
+        head = [f"Vote on {suspect.id}, {vs.timer * settings.TICK_DURATION:.0f}s left." if vs else f"Vote on {suspect.id}."]
+        head.append("Speakers:")
+        for ag in speakers:
+            stance = "against" if vs and vs.votes.get(ag.id) else "unsure"
+            knows = f", knows {ag.known_target}" if ag.known_target else ""
+            head.append(f"- {ag.id} ({ag.role}{knows}, {stance})")
+        task = "Write exactly one short line per speaker as `id: line`."
+
+        chat = self.chat_lines(state, settings.LLM_PROMPT_CHAT_LINES)
+        user = self._render(head, [], chat, task)
+        tokens = estimate_tokens(user)
+        truncated = False
+        while tokens > budget and chat:
+            truncated = True
+            chat.pop(0)
+            user = self._render(head, [], chat, task)
+            tokens = estimate_tokens(user)
+
+        self.stats.record(system_tokens + tokens, truncated)
+        return system, user
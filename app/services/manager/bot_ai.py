@@ -1,8 +1,8 @@
 import random, math
-from typing import List
+from typing import List, Optional, Set
 from .nav import random_room_center
 from app.config.models import Action
-from .state import GameState, AgentState
+from .state import GameState, AgentState, BotPlan
 from app.config.settings import settings
 
 def _step_towards(src: tuple[int,int], dst: List[int]) -> int:
@@ -12,22 +12,50 @@ def _step_towards(src: tuple[int,int], dst: List[int]) -> int:
     else:
         return 3 if dy > 0 else 1
 
-def rule_based_action(agent: AgentState, state: GameState) -> Action:
+def _at(pos: tuple[int,int], target: Optional[List[int]]) -> bool:
+    return target is not None and pos[0] == target[0] and pos[1] == target[1]
+
+def visible_agents(agent: AgentState, state: GameState) -> List[AgentState]:
+    pos = agent.position
+    out = []
+    for oid in state.grid.near(pos, settings.FOV_DISTANCE):
+        o = state.agents[oid]
+        if o.alive and o.id != agent.id \
+                and math.hypot(o.position[0]-pos[0], o.position[1]-pos[1]) <= settings.FOV_DISTANCE:
+            out.append(o)
+    return out
+
+def _finish(act: Action, agent: AgentState, state: GameState, has_visible: bool) -> Action:
+    if agent.is_knower and agent.role=="Survivor" and not agent.shared:
+        act.do_chat = True
+        agent.shared = True
+
+    if random.random()<0.5:
+        act.do_think = True
+    if len(state.vote_sessions) < settings.MAX_CONCURRENT_VOTES and random.random()<0.05:
+        act.do_vote = True
+        act.suspect_idx = 0 if has_visible else -1
+
+    return act
+
+def rule_based_action(agent: AgentState, state: GameState,
+                      plan: Optional[BotPlan] = None,
+                      visible: Optional[List[AgentState]] = None) -> Action:
     act = Action()
     pos = agent.position
+    plan = plan if plan is not None else BotPlan()
+    plan.target_agent = None
 
     for corpse in state.corpses:
         dist = math.hypot(corpse[0]-pos[0], corpse[1]-pos[1])
         if dist <= settings.HEAR_RADIUS * 3:
             act.do_chat = True
             agent.rally_point = [corpse[0], corpse[1]]
+            plan.intent = "rally"
             return act
 
-    visible = [
-        o for o in state.agents.values()
-        if o.alive and o.id != agent.id
-           and math.hypot(o.position[0]-pos[0], o.position[1]-pos[1]) <= settings.FOV_DISTANCE
-    ]
+    if visible is None:
+        visible = visible_agents(agent, state)
 
     if agent.role == "Survivor":
         low = [o for o in visible if agent.trust.get(o.id,1.0) < 0.4]
@@ -36,15 +64,23 @@ def rule_based_action(agent: AgentState, state: GameState) -> Action:
             if partners:
                 avgx = sum(o.position[0] for o in partners)/len(partners)
                 avgy = sum(o.position[1] for o in partners)/len(partners)
-                act.move = _step_towards(pos, [int(avgx), int(avgy)])
+                plan.intent = "regroup"
+                plan.target = [int(avgx), int(avgy)]
+                act.move = _step_towards(pos, plan.target)
             else:
                 agent.target = random_room_center(agent, state.rooms)
+                plan.intent = "flee"
+                plan.target = agent.target
                 act.move = _step_towards(pos, agent.target)
         elif visible and random.random()<0.2:
+            plan.intent = "wander"
+            plan.target = agent.target
             act.do_chat = True
         else:
-            if not agent.target or pos == agent.target:
+            if not agent.target or _at(pos, agent.target):
                 agent.target = random_room_center(agent, state.rooms)
+            plan.intent = "wander"
+            plan.target = agent.target
             act.move = _step_towards(pos, agent.target)
 
     else:
@@ -59,26 +95,83 @@ def rule_based_action(agent: AgentState, state: GameState) -> Action:
                 vic.position[0] - pos[0],
                 vic.position[1] - pos[1]
             )
+            plan.intent = "hunt"
+            plan.target_agent = vic.id
             if dist <= settings.KILL_RADIUS and agent.kill_cooldown == 0:
                 act.do_kill = True
             else:
                 target_pos: List[int] = list(vic.position)
                 act.move = _step_towards(pos, target_pos)
         else:
-            if not agent.target or pos == agent.target:
+            if not agent.target or _at(pos, agent.target):
                 agent.target = random_room_center(agent, state.rooms)
+            plan.intent = "wander"
+            plan.target = agent.target
             target_room: List[int] = list(agent.target)
             act.move = _step_towards(pos, target_room)
 
+    return _finish(act, agent, state, bool(visible))
 
-    if agent.is_knower and agent.role=="Survivor" and not agent.shared:
+def follow_plan(agent: AgentState, state: GameState, plan: BotPlan, has_visible: bool) -> Action:
+    act = Action()
+    pos = agent.position
+
+    if plan.intent == "rally":
         act.do_chat = True
-        agent.shared = True
+        return act
 
-    if random.random()<0.5:
-        act.do_think = True
-    if state.vote_session is None and random.random()<0.05:
-        act.do_vote = True
-        act.suspect_idx = 0 if visible else -1
+    if plan.intent == "hunt":
+        vic = state.agents[plan.target_agent]
+        dist = math.hypot(vic.position[0] - pos[0], vic.position[1] - pos[1])
+        if dist <= settings.KILL_RADIUS and agent.kill_cooldown == 0:
+            act.do_kill = True
+        else:
+            act.move = _step_towards(pos, list(vic.position))
+    elif plan.intent == "wander" and agent.role == "Survivor" and has_visible and random.random()<0.2:
+        act.do_chat = True
+    else:
+        act.move = _step_towards(pos, plan.target)
 
-    return act
+    return _finish(act, agent, state, has_visible)
+
+def replan_events(state: GameState) -> Set[str]:
+    forced: Set[str] = set()
+
+    if len(state.corpses) != state.planned_corpses:
+        for corpse in state.corpses[state.planned_corpses:]:
+            forced.update(state.grid.near(corpse, settings.HEAR_RADIUS * 3))
+        state.planned_corpses = len(state.corpses)
+
+    votes = frozenset(state.vote_sessions)
+    if votes - state.planned_votes:
+        forced.update(state.agents)
+    state.planned_votes = votes
+
+    return forced
+
+def planned_action(agent: AgentState, state: GameState, forced: Set[str]) -> Action:
+    plan = state.plans.get(agent.id)
+    if plan is None:
+        # spread the first re-plans so agents don't all decide on the same tick
+        plan = BotPlan(next_replan=state.tick + len(state.plans) % settings.BOT_REPLAN_INTERVAL)
+        state.plans[agent.id] = plan
+        replan = True
+    else:
+        replan = agent.id in forced or state.tick >= plan.next_replan
+
+    visible = visible_agents(agent, state)
+    seen = frozenset(o.id for o in visible)
+    if not replan:
+        if plan.intent == "hunt":
+            # the victim must still be a live, visible target
+            replan = plan.target_agent not in seen
+        elif plan.intent != "rally":
+            replan = plan.target is None or _at(agent.position, plan.target)
+        replan = replan or not seen <= plan.seen
+    plan.seen = seen
+
+    if replan:
+        if state.tick >= plan.next_replan:
+            plan.next_replan = state.tick + settings.BOT_REPLAN_INTERVAL
+        return rule_based_action(agent, state, plan, visible)
+    return follow_plan(agent, state, plan, bool(visible))
@@ -0,0 +1,182 @@
+import os
+import pickle
+import random
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from app.config.models import Action, GroupChatSession, Room
+from app.config.settings import settings
+from .state import AgentState, BotPlan, GameState, VoteSession
+from ..utils.tiles import TileGrid
+
+_MAGIC = b"LSZCKPT1"
+_FILE = "game.ckpt"
+
+
+def snapshot(state: GameState) -> Dict[str, Any]:
+    # plain containers only, copied so the writer thread never sees later mutations
+    return {
+        "tick": state.tick,
+        "map_asset": state.map_asset,
+        "rooms": [r.model_dump() for r in state.rooms],
+        "evac_zone": state.evac_zone.id if state.evac_zone else None,
+        "evac_open": state.evac_open,
+        "agents": [ag.model_dump() for ag in state.agents.values()],
+        "map_size": state.map_size,
+        # tiles never change after /init, no copy needed
+        "tiles": (state.tiles.width, state.tiles.height, state.tiles.data),
+        "corpses": list(state.corpses),
+        "group_chats": [(s.id, set(s.members), s.timer) for s in state.group_chats.values()],
+        "group_member": dict(state.group_member),
+        "group_seq": state.group_seq,
+        "pending_external": {aid: a.model_dump() for aid, a in state.pending_external.items()},
+        "vote_sessions": [asdict(vs) for vs in state.vote_sessions.values()],
+        "chat_log": list(state.chat_log),
+        "plans": {aid: asdict(p) for aid, p in state.plans.items()},
+        "planned_corpses": state.planned_corpses,
+        "planned_votes": list(state.planned_votes),
+        "random": random.getstate(),
+    }
+
+
+def restore(snap: Dict[str, Any]) -> GameState:
+    state = GameState()
+    state.tick = snap["tick"]
+    state.map_asset = snap["map_asset"]
+    state.rooms = [Room.model_validate(r) for r in snap["rooms"]]
+    state.evac_zone = next((r for r in state.rooms if r.id == snap["evac_zone"]), None)
+    state.evac_open = snap["evac_open"]
+    width, height, tiles = snap["tiles"]
+    state.tiles = TileGrid(width, height, bytearray(tiles))
+    state.map_size = tuple(snap["map_size"])
+    state.corpses = [tuple(c) for c in snap["corpses"]]
+    state.group_chats = {
+        sid: GroupChatSession(id=sid, members=members, timer=timer)
+        for sid, members, timer in snap["group_chats"]
+    }
+    state.group_member = snap["group_member"]
+    state.group_seq = snap["group_seq"]
+    state.pending_external = {aid: Action(**a) for aid, a in snap["pending_external"].items()}
+    state.vote_sessions = {vs["suspect_id"]: VoteSession(**vs) for vs in snap["vote_sessions"]}
+    state.chat_log = snap["chat_log"]
+    state.plans = {aid: BotPlan(**p) for aid, p in snap["plans"].items()}
+    state.planned_corpses = snap["planned_corpses"]
+    state.planned_votes = frozenset(snap["planned_votes"])
+
+    # derived indexes are rebuilt rather than stored
+    for raw in snap["agents"]:
+        ag = AgentState(**raw)
+        state.agents[ag.id] = ag
+        state.grid.move(ag.id, ag.position)
+        state.clusters.mark(ag.id)
+
+    random.setstate(snap["random"])
+    return state
+
+
+class Checkpointer:
+    _lock = threading.Lock()
+    _write_lock = threading.Lock()
+    _wake = threading.Event()
+    _latest: Optional[Tuple[int, Dict[str, Any]]] = None
+    _seq = 0
+    _written_seq = 0
+    _thread: Optional[threading.Thread] = None
+    _written = 0
+    _skipped = 0
+    _last_tick = -1
+    _last_bytes = 0
+    _last_ms = 0.0
+
+    @classmethod
+    def path(cls) -> Path:
+        return Path(settings.CHECKPOINT_DIR) / _FILE
+
+    @classmethod
+    def maybe_save(cls, state: GameState) -> None:
+        interval = settings.CHECKPOINT_INTERVAL_TICKS
+        if interval <= 0 or state.tick % interval:
+            return
+        cls.submit(snapshot(state))
+
+    @classmethod
+    def submit(cls, snap: Dict[str, Any]) -> None:
+        with cls._lock:
+            if cls._latest is not None:
+                # the writer is behind; only the newest snapshot is worth writing
+                cls._skipped += 1
+            cls._seq += 1
+            cls._latest = (cls._seq, snap)
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._run, name="checkpoint-writer", daemon=True)
+                cls._thread.start()
+        cls._wake.set()
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            cls._wake.wait()
+            with cls._lock:
+                latest, cls._latest = cls._latest, None
+                cls._wake.clear()
+            if latest is None:
+                continue
+            try:
+                cls._write(*latest)
+            except Exception as e:
+                print(f"⚠️ checkpoint not written: {e}")
+
+    @classmethod
+    def _write(cls, seq: int, snap: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        payload = _MAGIC + zlib.compress(pickle.dumps(snap, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        target = cls.path()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        with cls._write_lock:
+            # a newer snapshot (e.g. the shutdown one) may have overtaken this one
+            if seq < cls._written_seq:
+                return
+            with open(tmp, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            # readers only ever see a complete file
+            os.replace(tmp, target)
+            cls._written += 1
+            cls._written_seq = seq
+            cls._last_tick = snap["tick"]
+            cls._last_bytes = len(payload)
+            cls._last_ms = (time.perf_counter() - started) * 1000
+
+    @classmethod
+    def save_now(cls, state: GameState) -> None:
+        with cls._lock:
+            cls._latest = None
+            cls._seq += 1
+            seq = cls._seq
+        cls._write(seq, snapshot(state))
+
+    @classmethod
+    def load(cls) -> Optional[GameState]:
+        target = cls.path()
+        if not target.is_file():
+            return None
+        data = target.read_bytes()
+        if not data.startswith(_MAGIC):
+            print(f"⚠️ {target} is not a checkpoint, ignored")
+            return None
+        return restore(pickle.loads(zlib.decompress(data[len(_MAGIC):])))
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "written": cls._written,
+            "skipped": cls._skipped,
+            "last_tick": cls._last_tick,
+            "last_bytes": cls._last_bytes,
+            "last_write_ms": round(cls._last_ms, 2),
+        }
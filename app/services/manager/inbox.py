@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Dict, Iterable, Tuple
+from pydantic import TypeAdapter, ValidationError
+from app.config.models import Action
+
+_ACTIONS = TypeAdapter(Dict[str, Action])
+
+
+class ActionInbox:
+    # actions from all /ws clients, merged last-write-wins per agent until the next step drains them
+    _lock = threading.Lock()
+    _pending: Dict[str, Action] = {}
+    _drained_at: int = -1
+    _messages = 0
+    _accepted = 0
+    _rejected = 0
+    _coalesced = 0
+    _steps = 0
+
+    @classmethod
+    def _validate(cls, raw: Dict[str, Any], agents: Iterable[str]) -> Tuple[Dict[str, Action], Dict[str, str]]:
+        rejected: Dict[str, str] = {}
+        try:
+            actions = _ACTIONS.validate_python(raw)
+        except ValidationError:
+            # only a bad batch pays for per-agent validation
+            actions = {}
+            for aid, value in raw.items():
+                try:
+                    actions[aid] = Action.model_validate(value)
+                except ValidationError as e:
+                    rejected[str(aid)] = e.errors()[0]["msg"]
+        known = set(agents)
+        for aid in [aid for aid in actions if aid not in known]:
+            del actions[aid]
+            rejected[aid] = "unknown agent"
+        return actions, rejected
+
+    @classmethod
+    def submit(cls, raw: Any, agents: Iterable[str], tick: int) -> dict:
+        if isinstance(raw, dict):
+            actions, rejected = cls._validate(raw, agents)
+        else:
+            actions, rejected = {}, {"*": "external_actions must be an object"}
+        with cls._lock:
+            cls._messages += 1
+            cls._accepted += len(actions)
+            cls._rejected += len(rejected)
+            cls._coalesced += sum(1 for aid in actions if aid in cls._pending)
+            cls._pending.update(actions)
+            # a step that already drained the inbox is in flight, so these wait for the one after it
+            applies = max(tick, cls._drained_at + 1) + 1
+        return {"tick": applies, "accepted": list(actions), "rejected": rejected}
+
+    @classmethod
+    def drain(cls, tick: int) -> Dict[str, Action]:
+        with cls._lock:
+            actions, cls._pending = cls._pending, {}
+            cls._drained_at = tick
+            cls._steps += 1
+        return actions
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._pending = {}
+            cls._drained_at = -1
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "messages": cls._messages,
+                "accepted": cls._accepted,
+                "rejected": cls._rejected,
+                "coalesced": cls._coalesced,
+                "pending": len(cls._pending),
+                "steps": cls._steps,
+            }
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 from app.config.models import Delta, Room
 from .state import GameState
 from .mechanics import (
@@ -7,10 +7,21 @@ from .mechanics import (
     apply_cooldowns_and_advance_tick, check_win_conditions, process_thoughts, process_group_chat, process_gossip
 )
 from .state import AgentState
+from .inbox import ActionInbox
+from .checkpoint import Checkpointer
+from ..utils.tiles import TileGrid
+from ..llm.llm_service import LLMService
+from ..recording.trajectory import TrajectoryRecorder
 import random
+import threading
+
+_WIN_EVENTS = ("survivors_win", "infected_win")
+T = TypeVar("T")
 
 class GameManager:
     _state: GameState = None
+    # steps run off the event loop (see the auto-ticker), one at a time
+    _step_lock = threading.RLock()
 
     @classmethod
     def initialize(cls, map_asset: str, rooms: List[Room]) -> None:
@@ -19,6 +30,8 @@ class GameManager:
         state = GameState()
         state.map_asset = map_asset
         state.rooms = rooms
+        state.tiles = TileGrid.from_rooms(rooms)
+        state.map_size = (state.tiles.width, state.tiles.height)
 
         state.evac_zone = random.choice(rooms)
         state.evac_open = False
@@ -51,8 +64,31 @@ class GameManager:
                 rally_point=None,
                 trust=trust
             )
+            state.grid.move(aid, pos)
+            state.clusters.mark(aid)
+
+        cls._install(state)
+
+    @classmethod
+    def _install(cls, state: GameState) -> None:
+        with cls._step_lock:
+            cls._state = state
+            ActionInbox.clear()
+        TrajectoryRecorder.start(state)
 
-        cls._state = state
+    @classmethod
+    def restore(cls) -> bool:
+        state = Checkpointer.load()
+        if state is None:
+            return False
+        cls._install(state)
+        return True
+
+    @classmethod
+    def checkpoint(cls) -> None:
+        with cls._step_lock:
+            if cls._state is not None:
+                Checkpointer.save_now(cls._state)
 
     @classmethod
     def get_state(cls) -> GameState:
@@ -61,25 +97,56 @@ class GameManager:
         return cls._state
 
     @classmethod
-    def step_deterministic(cls, external_actions: Dict[str, Any]) -> Delta:
-        state = cls.get_state()
-        delta = Delta()
-
-        actions = collect_actions(state, external_actions)
-        process_movements(state, actions, delta)
-        process_kills(state, actions, delta)
-        process_votes(state, actions, delta)
-        check_evac_open(state, delta)
-        process_chat(state, actions, delta)
-        process_group_chat(state, delta)
-        process_gossip(state, delta)
-        process_thoughts(state, actions, delta)
-        apply_cooldowns_and_advance_tick(state)
-        check_win_conditions(state, delta)
-
-        return delta
+    def read(cls, view: Callable[[GameState], T]) -> T:
+        # client snapshots are built between steps, never from a half-applied one
+        with cls._step_lock:
+            return view(cls.get_state())
+
+    @classmethod
+    def step_deterministic(cls, external_actions: Dict[str, Any], use_llm: bool = True) -> Tuple[int, Delta]:
+        with cls._step_lock:
+            state = cls.get_state()
+            delta = Delta()
+            LLMService.begin_tick(offline=not use_llm)
+
+            queued = ActionInbox.drain(state.tick)
+            if queued:
+                # explicit actions of this call win over ones queued from /ws
+                external_actions = {**queued, **(external_actions or {})}
+            actions = collect_actions(state, external_actions)
+            process_movements(state, actions, delta)
+            process_kills(state, actions, delta)
+            process_votes(state, actions, delta)
+            check_evac_open(state, delta)
+            process_chat(state, actions, delta)
+            process_group_chat(state, delta)
+            process_gossip(state, delta)
+            process_thoughts(state, actions, delta)
+            apply_cooldowns_and_advance_tick(state)
+            check_win_conditions(state, delta)
+            TrajectoryRecorder.record(state, actions, delta)
+            Checkpointer.maybe_save(state)
+            if use_llm:
+                LLMService.speculate(state)
+
+            # the tick is taken under the lock, another step may follow before the caller looks
+            return state.tick, delta
+
+    @classmethod
+    def step_many(cls, ticks: int, actions: Optional[List[Dict[str, Any]]] = None, use_llm: bool = True,
+                  stop_on_win: bool = False, on_step: Optional[Callable[[int, Delta], None]] = None) -> int:
+        actions = actions or []
+        # the whole batch holds the lock, so its ticks are contiguous even with the auto-ticker running
+        with cls._step_lock:
+            for i in range(ticks):
+                tick, delta = cls.step_deterministic(actions[i] if i < len(actions) else {}, use_llm)
+                if on_step is not None:
+                    on_step(tick, delta)
+                if stop_on_win and any(m.get("system") in _WIN_EVENTS for m in delta.chat):
+                    return i + 1
+        return ticks
 
     @classmethod
-    def step_rl(cls, external_actions: Dict[str, Any]) -> Delta:
+    def step_rl(cls, external_actions: Dict[str, Any]) -> Tuple[int, Delta]:
         # RLService.compute_actions
         return cls.step_deterministic(external_actions)
@@ -5,17 +5,18 @@ from app.config.settings import (settings)
 from app.config.models import Delta, Action, GroupChatSession
 from ..llm.llm_service import LLMService
 from ..utils.geometry import point_in_any_room, has_line_of_sight, point_in_polygon
-from .bot_ai import rule_based_action
+from .bot_ai import planned_action, replan_events
 import random
 
 def collect_actions(state: GameState, external: Dict[str, Any]) -> Dict[str, Action]:
     actions: Dict[str, Action] = {}
+    forced = replan_events(state)
     for aid, ag in state.agents.items():
         if not ag.alive:
             continue
         raw = (external or {}).get(aid)
         if raw is None:
-            actions[aid] = rule_based_action(ag, state)
+            actions[aid] = planned_action(ag, state, forced)
         elif isinstance(raw, Action):
             actions[aid] = raw
         else:
@@ -34,6 +35,8 @@ def process_movements(state: GameState, actions: Dict[str, Action], delta: Delta
         if point_in_any_room(new_pos, state.rooms):
             ag.position = new_pos
             ag.heading = heading_map[act.move]
+            state.grid.move(aid, new_pos)
+            state.clusters.mark(aid)
             delta.positions[aid] = [new_pos[0], new_pos[1]]
 
 def process_kills(state: GameState, actions: dict[str, Action], delta: Delta) -> None:
@@ -53,7 +56,7 @@ def process_kills(state: GameState, actions: dict[str, Action], delta: Delta) ->
 
     for killer, victim in kill_events:
         vk = state.agents[victim]
-        vk.alive = False
+        mark_dead(state, victim)
         corpse_pos: tuple[int, int] = (vk.position[0], vk.position[1])
         state.corpses.append(corpse_pos)
         delta.infections[victim] = True
@@ -71,8 +74,7 @@ def process_kills(state: GameState, actions: dict[str, Action], delta: Delta) ->
                 )
                 if not seen_killer:
                     new_trust = max(0.0, other.trust.get(killer, 1.0) - settings.SOUND_TRUST_PENALTY)
-                    other.trust[killer] = new_trust
-                    delta.trust[f"{aid2}->{killer}"] = new_trust
+                    set_trust(state, aid2, killer, new_trust, delta)
 
                     other.panic = True
                     other.panic_ticks = settings.PANIC_DURATION
@@ -83,48 +85,72 @@ def process_kills(state: GameState, actions: dict[str, Action], delta: Delta) ->
                         "tick": state.tick
                     })
 
-def process_votes(state: GameState, actions: dict[str, Action], delta: Delta) -> None:
-    vs = state.vote_session
+def set_trust(state: GameState, aid: str, other_id: str, value: float, delta: Delta) -> None:
+    state.agents[aid].trust[other_id] = value
+    delta.trust[f"{aid}->{other_id}"] = value
 
-    if vs is None:
-        for aid, act in actions.items():
-            ag = state.agents[aid]
-            if act.do_vote and ag.alive and ag.vote_cooldown == 0:
-                visible = [vid for vid, v in state.agents.items() if v.alive and vid != aid]
-                idx = act.suspect_idx
-                if 0 <= idx < len(visible):
-                    state.vote_session = VoteSession(
-                        suspect_id=visible[idx],
-                        votes={},
-                        timer=settings.VOTE_DURATION_TICKS
-                    )
-                    ag.vote_cooldown = settings.VOTE_DURATION_TICKS
-                    delta.chat.append({
-                        "system": "vote_started",
-                        "suspect": visible[idx],
-                        "initiator": aid,
-                        "tick": state.tick
-                    })
-                    break
+    # open votes follow trust changes instead of re-polling every voter each tick
+    vs = state.vote_sessions.get(other_id)
+    if vs is not None and aid in vs.votes:
+        vote = value < 0.5
+        if vote != vs.votes[aid]:
+            vs.votes[aid] = vote
+            vs.yes += 1 if vote else -1
+
+
+def mark_dead(state: GameState, aid: str) -> None:
+    state.agents[aid].alive = False
+    state.clusters.mark(aid)
+    for vs in state.vote_sessions.values():
+        if vs.votes.pop(aid, False):
+            vs.yes -= 1
+
+
+def process_votes(state: GameState, actions: dict[str, Action], delta: Delta) -> None:
+    for aid, act in actions.items():
+        if len(state.vote_sessions) >= settings.MAX_CONCURRENT_VOTES:
+            break
+        ag = state.agents[aid]
+        if act.do_vote and ag.alive and ag.vote_cooldown == 0:
+            visible = [vid for vid, v in state.agents.items() if v.alive and vid != aid]
+            idx = act.suspect_idx
+            if 0 <= idx < len(visible) and visible[idx] not in state.vote_sessions:
+                suspect = visible[idx]
+                votes = {
+                    vid: (v.trust.get(suspect, 0.0) < 0.5)
+                    for vid, v in state.agents.items() if v.alive
+                }
+                state.vote_sessions[suspect] = VoteSession(
+                    suspect_id=suspect,
+                    votes=votes,
+                    timer=settings.VOTE_DURATION_TICKS,
+                    yes=sum(votes.values())
+                )
+                ag.vote_cooldown = settings.VOTE_DURATION_TICKS
+                delta.chat.append({
+                    "system": "vote_started",
+                    "suspect": suspect,
+                    "initiator": aid,
+                    "tick": state.tick
+                })
 
-    if state.vote_session:
-        vs = state.vote_session
+    for vs in list(state.vote_sessions.values()):
         vs.timer -= 1
-        vs.votes = {
-            aid: (state.agents[aid].trust.get(vs.suspect_id, 0.0) < 0.5)
-            for aid, ag in state.agents.items() if ag.alive
-        }
 
-        for aid in vs.votes:
-            ag = state.agents[aid]
-            if ag.chat_cooldown == 0:
-                msg = LLMService.generate(ag, [state.agents[vs.suspect_id]], state)
+        speakers = [
+            state.agents[aid] for aid in vs.votes
+            if state.agents[aid].chat_cooldown == 0
+        ]
+        if speakers:
+            # one multi-speaker request per vote instead of one per voter
+            for msg in LLMService.generate_discussion(speakers, state.agents[vs.suspect_id], state):
                 state.chat_log.append(msg)
                 delta.chat.append(msg)
+            for ag in speakers:
                 ag.chat_cooldown = settings.VOTE_DURATION_TICKS // 2
 
         if vs.timer <= 0:
-            yes = sum(vs.votes.values())
+            yes = vs.yes
             no = len(vs.votes) - yes
             result = "passed" if yes > no else "failed"
             delta.chat.append({
@@ -135,8 +161,9 @@ def process_votes(state: GameState, actions: dict[str, Action], delta: Delta) ->
                 "result": result,
                 "tick": state.tick
             })
+            del state.vote_sessions[vs.suspect_id]
             if yes > no:
-                state.agents[vs.suspect_id].alive = False
+                mark_dead(state, vs.suspect_id)
                 delta.infections[vs.suspect_id] = False
 
             for aid in vs.votes:
@@ -144,10 +171,7 @@ def process_votes(state: GameState, actions: dict[str, Action], delta: Delta) ->
                 other.panic = False
                 other.panic_ticks = 0
 
-                other.trust[vs.suspect_id] = 0.0
-                delta.trust[f"{aid}->{vs.suspect_id}"] = 0.0
-
-            state.vote_session = None
+                set_trust(state, aid, vs.suspect_id, 0.0, delta)
 
 def process_gossip(state: GameState, delta: Delta) -> None:
     new_actions: dict[str, Action] = {}
@@ -200,37 +224,108 @@ def process_chat(state: GameState, actions: Dict[str, Action], delta: Delta) ->
             and has_line_of_sight(ag.position, v.position, state.rooms)
         ]
 
-        msg = LLMService.generate(agent=ag, visible_agents=visible, state=prompt_state)
-        state.chat_log.append(msg)
-        delta.chat.append(msg)
+        near_corpse = any(
+            hypot(c[0]-ag.position[0], c[1]-ag.position[1]) <= settings.HEAR_RADIUS * 3
+            for c in state.corpses
+        )
+        msg = LLMService.generate(
+            agent=ag, visible_agents=visible, state=prompt_state,
+            situation="corpse" if near_corpse else "chat"
+        )
+        if msg is not None:
+            state.chat_log.append(msg)
+            delta.chat.append(msg)
         ag.chat_cooldown = max(1, int((1 - min(ag.trust.values())) * settings.VOTE_DURATION_TICKS))
 
 
+def _leave_group(state: GameState, aid: str, delta: Delta) -> None:
+    sid = state.group_member.pop(aid, None)
+    if sid is None:
+        return
+    state.group_chats[sid].members.discard(aid)
+    delta.group_chats.append({"session": sid, "event": "left", "agent": aid, "tick": state.tick})
+
+
+def _end_group(state: GameState, sid: str, delta: Delta) -> None:
+    gc = state.group_chats.pop(sid)
+    for aid in gc.members:
+        state.group_member.pop(aid, None)
+        # members that stay together regroup on the next tick
+        state.clusters.mark(aid)
+    delta.chat.append({
+        "system": "group_chat_ended",
+        "session": sid,
+        "members": list(gc.members),
+        "tick": state.tick
+    })
+    delta.group_chats.append({"session": sid, "event": "ended", "members": list(gc.members), "tick": state.tick})
+
+
 def process_group_chat(state: GameState, delta: Delta) -> None:
-    if state.group_chat is None:
-        for aid, ag in state.agents.items():
-            if not ag.alive:
+    def position_of(aid: str):
+        ag = state.agents[aid]
+        return ag.position if ag.alive else None
+
+    clusters = state.clusters.update(state.grid, position_of)
+    counts: list[dict[str, int]] = []
+    owner: dict[str, tuple[int, int]] = {}
+    for idx, cluster in enumerate(clusters):
+        c: dict[str, int] = {}
+        for aid in cluster:
+            sid = state.group_member.get(aid)
+            if sid is not None:
+                c[sid] = c.get(sid, 0) + 1
+        counts.append(c)
+        for sid, n in c.items():
+            if sid not in owner or n > owner[sid][0]:
+                owner[sid] = (n, idx)
+
+    touched: set[str] = set()
+    for idx, cluster in enumerate(clusters):
+        # a session stays with the cluster holding most of its members
+        won = [sid for sid in counts[idx] if owner[sid][1] == idx]
+        primary = max(won, key=counts[idx].get) if won else None
+        if primary is None and len(cluster) >= settings.GROUP_CHAT_MIN:
+            primary = f"gc_{state.group_seq}"
+            state.group_seq += 1
+            state.group_chats[primary] = GroupChatSession(
+                id=primary,
+                members=set(),
+                timer=settings.GROUP_CHAT_DURATION_TICKS
+            )
+            delta.chat.append({
+                "system": "group_chat_started",
+                "session": primary,
+                "members": list(cluster),
+                "tick": state.tick
+            })
+            delta.group_chats.append({"session": primary, "event": "started", "members": list(cluster), "tick": state.tick})
+
+        for aid in cluster:
+            sid = state.group_member.get(aid)
+            if sid == primary:
                 continue
-            members = {
-                bid for bid, bg in state.agents.items()
-                if bg.alive and bid != aid
-                and hypot(bg.position[0] - ag.position[0],
-                          bg.position[1] - ag.position[1]) <= settings.GROUP_CHAT_RADIUS
-            } | {aid}
-            if len(members) >= settings.GROUP_CHAT_MIN:
-                state.group_chat = GroupChatSession(
-                    members=members,
-                    timer=settings.GROUP_CHAT_DURATION_TICKS
-                )
-                delta.chat.append({
-                    "system": "group_chat_started",
-                    "members": list(members),
-                    "tick": state.tick
-                })
-                break
+            if sid is not None:
+                touched.add(sid)
+                _leave_group(state, aid, delta)
+            if primary is not None:
+                state.group_chats[primary].members.add(aid)
+                state.group_member[aid] = primary
+                delta.group_chats.append({"session": primary, "event": "joined", "agent": aid, "tick": state.tick})
+        if primary is not None:
+            touched.add(primary)
+
+    # dead agents drop out of every cluster
+    for sid in touched:
+        gc = state.group_chats.get(sid)
+        if gc is None:
+            continue
+        for aid in [a for a in gc.members if a not in state.clusters.label]:
+            _leave_group(state, aid, delta)
+        if len(gc.members) < settings.GROUP_CHAT_MIN:
+            _end_group(state, sid, delta)
 
-    gc = state.group_chat
-    if gc:
+    for sid, gc in list(state.group_chats.items()):
         gc.timer -= 1
         for aid in gc.members:
             ag = state.agents[aid]
@@ -238,17 +333,13 @@ def process_group_chat(state: GameState, delta: Delta) -> None:
                 continue
 
             others = [state.agents[bid] for bid in gc.members if bid != aid]
-            msg = LLMService.generate(ag, others, state)
-            state.chat_log.append(msg)
-            delta.chat.append(msg)
+            msg = LLMService.generate(ag, others, state, situation="group")
+            if msg is not None:
+                state.chat_log.append(msg)
+                delta.chat.append(msg)
             ag.chat_cooldown = settings.GROUP_CHAT_COOLDOWN
         if gc.timer <= 0:
-            delta.chat.append({
-                "system": "group_chat_ended",
-                "members": list(gc.members),
-                "tick": state.tick
-            })
-            state.group_chat = None
+            _end_group(state, sid, delta)
 
 def process_thoughts(state: GameState, actions: Dict[str, Action], delta: Delta) -> None:
     for aid, act in actions.items():
@@ -258,6 +349,8 @@ def process_thoughts(state: GameState, actions: Dict[str, Action], delta: Delta)
                      if v.alive and v.id!=aid and hypot(v.position[0]-ag.position[0],
                                                          v.position[1]-ag.position[1])<=settings.FOV_DISTANCE]
             thought=LLMService.generate_thought(ag,visible,state)
+            if thought is None:
+                continue
             entry={"from":aid,"thought":thought,"tick":state.tick}
             state.chat_log.append(entry); delta.chat.append(entry)
             ag.chat_cooldown = settings.VOTE_DURATION_TICKS//2
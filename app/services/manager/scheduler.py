@@ -0,0 +1,56 @@
+import asyncio
+import time
+from typing import Optional
+from app.config.settings import settings
+
+
+class TickScheduler:
+    _interval: float = settings.TICK_DURATION
+    _last_activity: float = time.monotonic()
+    _last_step: float = 0.0
+    _mode: str = "run"
+    _wake: Optional[asyncio.Event] = None
+
+    @classmethod
+    def touch(cls) -> None:
+        cls._last_activity = time.monotonic()
+        if cls._wake is not None:
+            cls._wake.set()
+
+    @classmethod
+    def mode(cls, subscribers: int) -> str:
+        if subscribers > 0 or time.monotonic() - cls._last_activity < settings.IDLE_GRACE_SECS:
+            cls._mode = "run"
+        else:
+            cls._mode = settings.IDLE_POLICY
+        return cls._mode
+
+    @classmethod
+    async def wait_for_activity(cls) -> None:
+        if cls._wake is None:
+            cls._wake = asyncio.Event()
+        cls._wake.clear()
+        await cls._wake.wait()
+
+    @classmethod
+    def record_step(cls, duration: float, lag: float) -> None:
+        cls._last_step = duration
+        # back off while steps (plus event loop lag) eat most of the tick, recover slowly
+        load = (duration + max(0.0, lag)) / cls._interval
+        if load > settings.TICK_OVERLOAD_RATIO:
+            cls._interval = min(settings.TICK_MAX_DURATION, cls._interval * 1.25)
+        elif load < settings.TICK_OVERLOAD_RATIO / 2:
+            cls._interval = max(settings.TICK_DURATION, cls._interval * 0.9)
+
+    @classmethod
+    def interval(cls) -> float:
+        return cls._interval
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "mode": cls._mode,
+            "interval": round(cls._interval, 4),
+            "last_step_ms": round(cls._last_step * 1000, 2),
+            "idle_secs": round(time.monotonic() - cls._last_activity, 1),
+        }
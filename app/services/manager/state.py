@@ -1,7 +1,10 @@
 from pydantic import BaseModel
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from app.config.settings import settings
 from app.config.models import Room, GroupChatSession, Action
+from app.services.utils.spatial import ProximityClusters, SpatialGrid
+from app.services.utils.tiles import TileGrid
 
 
 class AgentState(BaseModel):
@@ -30,6 +33,25 @@ class VoteSession:
     suspect_id: str
     votes: Dict[str, bool]
     timer: int
+    yes: int = 0
+
+@dataclass
+class BotPlan:
+    # wander | regroup | flee | hunt | rally
+    intent: str = "wander"
+    target: Optional[List[int]] = None
+    target_agent: Optional[str] = None
+    seen: FrozenSet[str] = frozenset()
+    next_replan: int = 0
+
+
+def _agent_grid() -> SpatialGrid:
+    return SpatialGrid(max(settings.FOV_DISTANCE, settings.GROUP_CHAT_RADIUS))
+
+
+def _chat_clusters() -> ProximityClusters:
+    return ProximityClusters(settings.GROUP_CHAT_RADIUS)
+
 
 @dataclass
 class GameState:
@@ -40,11 +62,19 @@ class GameState:
     evac_open: bool = False
 
     agents: Dict[str, AgentState] = field(default_factory=dict)
+    grid: SpatialGrid = field(default_factory=_agent_grid)
     map_size: Tuple[int, int] = (0, 0)
-    tiles: List[List[int]] = field(default_factory=list)
+    tiles: TileGrid = field(default_factory=TileGrid)
     corpses: List[Tuple[int, int]] = field(default_factory=list)
-    group_chat: Optional[GroupChatSession] = None
+    clusters: ProximityClusters = field(default_factory=_chat_clusters)
+    group_chats: Dict[str, GroupChatSession] = field(default_factory=dict)
+    group_member: Dict[str, str] = field(default_factory=dict)
+    group_seq: int = 0
     pending_external: Dict[str, Action] = field(default_factory=dict)
 
-    vote_session: Optional[VoteSession] = None
+    vote_sessions: Dict[str, VoteSession] = field(default_factory=dict)
     chat_log: List[Dict] = field(default_factory=list)
+
+    plans: Dict[str, BotPlan] = field(default_factory=dict)
+    planned_corpses: int = 0
+    planned_votes: FrozenSet[str] = frozenset()
@@ -0,0 +1,268 @@
+import json
+import queue
+import secrets
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.config.models import Action, Delta
+from app.config.settings import settings
+from app.services.manager.state import GameState
+
+# numpy is optional and only imported once recording is actually used
+np: Any = None
+
+
+def _load_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+# Action flags packed into one uint8 per agent and tick
+KILL, VOTE, CHAT, THINK = 1, 2, 4, 8
+_INT32_MIN, _INT32_MAX = -2**31, 2**31 - 1
+
+
+class _Chunk:
+    def __init__(self, index: int, size: int, agents: int):
+        self.index = index
+        self.rows = 0
+        self.events: List[tuple[int, str, Any]] = []
+        self.columns = {
+            "tick": np.zeros(size, np.int32),
+            "position": np.zeros((size, agents, 2), np.int32),
+            "heading": np.zeros((size, agents), np.float32),
+            "alive": np.zeros((size, agents), np.bool_),
+            "panic": np.zeros((size, agents), np.bool_),
+            "kill_cooldown": np.zeros((size, agents), np.int32),
+            "vote_cooldown": np.zeros((size, agents), np.int32),
+            "chat_cooldown": np.zeros((size, agents), np.int32),
+            "trust": np.full((size, agents, agents), np.nan, np.float32),
+            "action_move": np.full((size, agents), -1, np.int8),
+            "action_flags": np.zeros((size, agents), np.uint8),
+            "action_suspect": np.full((size, agents), -1, np.int32),
+        }
+
+
+class TrajectoryRecorder:
+    _lock = threading.Lock()
+    _queue: Optional[queue.Queue] = None
+    _thread: Optional[threading.Thread] = None
+    _run_dir: Optional[Path] = None
+    _ids: List[str] = []
+    _index: Dict[str, int] = {}
+    _chunk: Optional[_Chunk] = None
+    _chunks = 0
+    _ticks = 0
+    _dropped = 0
+    _written = 0
+    _errors = 0
+    _warned = False
+
+    @classmethod
+    def enabled(cls) -> bool:
+        if not settings.RECORD_ENABLED:
+            return False
+        if not _load_numpy():
+            if not cls._warned:
+                print("⚠️ RECORD_ENABLED needs numpy, trajectories are not recorded")
+                cls._warned = True
+            return False
+        return True
+
+    @classmethod
+    def start(cls, state: GameState) -> None:
+        if not cls.enabled():
+            return
+        with cls._lock:
+            cls._flush_partial()
+            if cls._thread is None:
+                cls._queue = queue.Queue(maxsize=settings.RECORD_MAX_PENDING_CHUNKS)
+                cls._thread = threading.Thread(target=cls._run, name="trajectory-writer", daemon=True)
+                cls._thread.start()
+
+            run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+            cls._run_dir = Path(settings.RECORD_DIR) / run_id
+            cls._run_dir.mkdir(parents=True, exist_ok=True)
+            cls._ids = list(state.agents)
+            cls._index = {aid: i for i, aid in enumerate(cls._ids)}
+            cls._chunk = None
+            cls._chunks = 0
+
+            meta = {
+                "agents": cls._ids,
+                "roles": [state.agents[aid].role for aid in cls._ids],
+                "knower": next((aid for aid, ag in state.agents.items() if ag.is_knower), None),
+                "known_target": next((ag.known_target for ag in state.agents.values() if ag.is_knower), None),
+                "map_asset": state.map_asset,
+                "map_size": list(state.map_size),
+                "evac_zone": state.evac_zone.id if state.evac_zone else None,
+                "chunk_ticks": settings.RECORD_CHUNK_TICKS,
+                "action_flags": {"kill": KILL, "vote": VOTE, "chat": CHAT, "think": THINK},
+            }
+            (cls._run_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    @classmethod
+    def record(cls, state: GameState, actions: Dict[str, Action], delta: Delta) -> None:
+        if cls._run_dir is None:
+            return
+        try:
+            cls._record(state, actions, delta)
+        except Exception as e:
+            # the step has already changed the state, a recorder problem must not abort it
+            cls._errors += 1
+            if cls._errors == 1:
+                print(f"⚠️ trajectory row not recorded: {e}")
+
+    @classmethod
+    def _record(cls, state: GameState, actions: Dict[str, Action], delta: Delta) -> None:
+        with cls._lock:
+            chunk = cls._chunk
+            if chunk is None:
+                chunk = cls._chunk = _Chunk(cls._chunks, settings.RECORD_CHUNK_TICKS, len(cls._ids))
+                cls._chunks += 1
+            row = chunk.rows
+            cols = chunk.columns
+            index = cls._index
+
+            cols["tick"][row] = state.tick
+            for i, aid in enumerate(cls._ids):
+                ag = state.agents[aid]
+                cols["position"][row, i] = ag.position
+                cols["heading"][row, i] = ag.heading
+                cols["alive"][row, i] = ag.alive
+                cols["panic"][row, i] = ag.panic
+                cols["kill_cooldown"][row, i] = ag.kill_cooldown
+                cols["vote_cooldown"][row, i] = ag.vote_cooldown
+                cols["chat_cooldown"][row, i] = ag.chat_cooldown
+                trust = cols["trust"][row, i]
+                for oid, value in ag.trust.items():
+                    trust[index[oid]] = value
+
+                act = actions.get(aid)
+                if act is not None:
+                    cols["action_move"][row, i] = act.move
+                    cols["action_flags"][row, i] = (
+                        act.do_kill * KILL | act.do_vote * VOTE | act.do_chat * CHAT | act.do_think * THINK
+                    )
+                    # any int is a valid request (out of range just selects nobody), so clamp rather than reject
+                    cols["action_suspect"][row, i] = min(max(act.suspect_idx, _INT32_MIN), _INT32_MAX)
+
+            # events are kept as objects here and serialized on the writer thread
+            for aid, infected in delta.infections.items():
+                chunk.events.append((state.tick, "infection", {"agent": aid, "infected": infected}))
+            for msg in delta.chat:
+                chunk.events.append((state.tick, "chat", msg))
+            for event in delta.group_chats:
+                chunk.events.append((state.tick, "group_chat", event))
+
+            chunk.rows += 1
+            cls._ticks += 1
+            if chunk.rows == settings.RECORD_CHUNK_TICKS:
+                cls._submit(chunk)
+                cls._chunk = None
+
+    @classmethod
+    def _flush_partial(cls) -> None:
+        if cls._chunk is not None and cls._chunk.rows:
+            cls._submit(cls._chunk)
+        cls._chunk = None
+
+    @classmethod
+    def _submit(cls, chunk: _Chunk) -> None:
+        try:
+            cls._queue.put_nowait((cls._run_dir, chunk))
+        except queue.Full:
+            # never stall the tick on disk; the gap shows up as a missing chunk index
+            cls._dropped += 1
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            item = cls._queue.get()
+            try:
+                if item is None:
+                    return
+                run_dir, chunk = item
+                cls._write(run_dir, chunk)
+                cls._written += 1
+            except Exception as e:
+                print(f"⚠️ trajectory chunk not written: {e}")
+            finally:
+                cls._queue.task_done()
+
+    @staticmethod
+    def _write(run_dir: Path, chunk: _Chunk) -> None:
+        name = f"chunk_{chunk.index:06d}"
+        tmp = run_dir / f".{name}.tmp"
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir()
+
+        for key, column in chunk.columns.items():
+            np.save(tmp / f"{key}.npy", column[:chunk.rows])
+
+        # variable-length events as one utf-8 buffer plus offsets, Arrow style
+        blobs = [json.dumps({"kind": kind, **data}, separators=(",", ":")).encode() for _, kind, data in chunk.events]
+        offsets = np.zeros(len(blobs) + 1, np.int64)
+        if blobs:
+            offsets[1:] = np.cumsum([len(b) for b in blobs])
+        np.save(tmp / "event_tick.npy", np.array([t for t, _, _ in chunk.events], np.int32))
+        np.save(tmp / "event_offsets.npy", offsets)
+        np.save(tmp / "event_data.npy", np.frombuffer(b"".join(blobs), np.uint8))
+
+        tmp.rename(run_dir / name)
+
+    @classmethod
+    def close(cls) -> None:
+        with cls._lock:
+            cls._flush_partial()
+            cls._run_dir = None
+        if cls._thread is not None:
+            cls._queue.put(None)
+            cls._thread.join()
+            cls._thread = None
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "enabled": cls._run_dir is not None,
+            "dir": str(cls._run_dir) if cls._run_dir else None,
+            "ticks": cls._ticks,
+            "chunks_written": cls._written,
+            "chunks_dropped": cls._dropped,
+            "errors": cls._errors,
+            "pending": cls._queue.qsize() if cls._queue is not None else 0,
+        }
+
+
+def read_trajectory(run_dir: str | Path, mmap: bool = True) -> tuple[dict, List[Dict[str, Any]]]:
+    if not _load_numpy():
+        raise RuntimeError("reading trajectories needs numpy")
+    run_dir = Path(run_dir)
+    meta = json.loads((run_dir / "meta.json").read_text(encoding="utf-8"))
+    chunks = []
+    for chunk_dir in sorted(run_dir.glob("chunk_*")):
+        chunks.append({
+            path.stem: np.load(path, mmap_mode="r" if mmap else None)
+            for path in chunk_dir.glob("*.npy")
+        })
+    return meta, chunks
+
+
+def chunk_events(chunk: Dict[str, Any]) -> List[dict]:
+    data = bytes(chunk["event_data"])
+    offsets = chunk["event_offsets"]
+    events = []
+    for i, tick in enumerate(chunk["event_tick"]):
+        event = json.loads(data[offsets[i]:offsets[i + 1]])
+        # chat lines carry the tick they were said on; others get the recorded step's tick
+        event.setdefault("tick", int(tick))
+        events.append(event)
+    return events
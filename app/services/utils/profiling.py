@@ -0,0 +1,32 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+class StartupProfile:
+    _t0: float = time.perf_counter()
+    _phases: List[Tuple[str, float]] = []
+    _ready_ms: float = 0.0
+
+    @classmethod
+    @contextmanager
+    def phase(cls, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls._phases.append((name, (time.perf_counter() - started) * 1000))
+
+    @classmethod
+    def ready(cls) -> None:
+        cls._ready_ms = (time.perf_counter() - cls._t0) * 1000
+
+    @classmethod
+    def report(cls) -> Dict[str, float]:
+        out = {name: round(ms, 2) for name, ms in cls._phases}
+        out["total"] = round(cls._ready_ms, 2)
+        return out
+
+    @classmethod
+    def summary(cls) -> str:
+        return ", ".join(f"{k} {v:.1f}ms" for k, v in cls.report().items())
@@ -0,0 +1,131 @@
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+
+
+class SpatialGrid:
+    __slots__ = ("cell", "_cells", "_where")
+
+    def __init__(self, cell: int):
+        self.cell = max(1, cell)
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._where: Dict[str, Cell] = {}
+
+    def _key(self, pos) -> Cell:
+        return (int(pos[0]) // self.cell, int(pos[1]) // self.cell)
+
+    def move(self, item: str, pos) -> bool:
+        key = self._key(pos)
+        old = self._where.get(item)
+        if old == key:
+            return False
+        if old is not None:
+            bucket = self._cells[old]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[old]
+        self._cells.setdefault(key, set()).add(item)
+        self._where[item] = key
+        return True
+
+    def remove(self, item: str) -> None:
+        old = self._where.pop(item, None)
+        if old is not None:
+            bucket = self._cells[old]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[old]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._where.clear()
+
+    def near(self, pos, radius: float) -> Iterator[str]:
+        # candidates only: callers still apply their exact distance test
+        cx0, cy0 = self._key((pos[0] - radius, pos[1] - radius))
+        cx1, cy1 = self._key((pos[0] + radius, pos[1] + radius))
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket:
+                    yield from bucket
+
+
+class ProximityClusters:
+    __slots__ = ("radius", "label", "members", "_dirty", "_next")
+
+    def __init__(self, radius: float):
+        self.radius = radius
+        self.label: Dict[str, int] = {}
+        self.members: Dict[int, Set[str]] = {}
+        self._dirty: Set[str] = set()
+        self._next = 0
+
+    def mark(self, item: str) -> None:
+        self._dirty.add(item)
+
+    def update(self, grid: SpatialGrid, position_of: Callable[[str], Optional[Tuple[int, int]]]) -> List[Set[str]]:
+        # only clusters touched by dirty items are rebuilt; returns the rebuilt clusters
+        if not self._dirty:
+            return []
+        dirty, self._dirty = self._dirty, set()
+        r2 = self.radius * self.radius
+
+        affected: Set[str] = set()
+        for item in dirty:
+            affected.add(item)
+            old = self.label.get(item)
+            if old is not None:
+                affected |= self.members[old]
+            pos = position_of(item)
+            if pos is None:
+                continue
+            for other in grid.near(pos, self.radius):
+                if other not in affected:
+                    cid = self.label.get(other)
+                    if cid is not None:
+                        affected |= self.members[cid]
+                    else:
+                        affected.add(other)
+
+        for item in affected:
+            cid = self.label.pop(item, None)
+            if cid is not None:
+                self.members.pop(cid, None)
+
+        parent: Dict[str, str] = {}
+
+        def find(x: str) -> str:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        positions = {}
+        for item in affected:
+            pos = position_of(item)
+            if pos is not None:
+                positions[item] = pos
+                parent[item] = item
+        for item, (x, y) in positions.items():
+            for other in grid.near((x, y), self.radius):
+                opos = positions.get(other)
+                if opos is None or other == item:
+                    continue
+                if (opos[0] - x) ** 2 + (opos[1] - y) ** 2 <= r2:
+                    ra, rb = find(item), find(other)
+                    if ra != rb:
+                        parent[ra] = rb
+
+        groups: Dict[str, Set[str]] = {}
+        for item in positions:
+            groups.setdefault(find(item), set()).add(item)
+        rebuilt = []
+        for group in groups.values():
+            cid = self._next
+            self._next += 1
+            self.members[cid] = group
+            for item in group:
+                self.label[item] = cid
+            rebuilt.append(group)
+        return rebuilt
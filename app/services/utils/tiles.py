@@ -0,0 +1,136 @@
+import base64
+import hashlib
+from math import ceil
+from typing import Dict, List, Optional, Union
+from app.config.models import EncodedTiles, Room
+
+TILE_FORMATS = ("rle", "bitpack", "legacy", "none")
+
+
+class TileGrid:
+    __slots__ = ("width", "height", "data", "_encoded", "_digest")
+
+    def __init__(self, width: int = 0, height: int = 0, data: Optional[bytearray] = None):
+        self.width = width
+        self.height = height
+        self.data = data if data is not None else bytearray(width * height)
+        self._encoded: Dict[str, EncodedTiles] = {}
+        self._digest: Optional[str] = None
+
+    @classmethod
+    def from_rows(cls, rows: List[List[int]]) -> "TileGrid":
+        height = len(rows)
+        width = len(rows[0]) if rows else 0
+        data = bytearray(width * height)
+        for y, row in enumerate(rows):
+            data[y * width:(y + 1) * width] = bytes(row)
+        return cls(width, height, data)
+
+    @classmethod
+    def from_rooms(cls, rooms: List[Room]) -> "TileGrid":
+        if not rooms:
+            return cls()
+        width = max(p[0] for r in rooms for p in r.polygon) + 1
+        height = max(p[1] for r in rooms for p in r.polygon) + 1
+        grid = cls(width, height)
+        data = grid.data
+        # scanline fill with the same even-odd rule as geometry.point_in_polygon
+        for idx, room in enumerate(rooms, start=1):
+            poly = room.polygon
+            n = len(poly)
+            ys = [p[1] for p in poly]
+            for y in range(max(0, min(ys)), min(height, max(ys) + 1)):
+                xs = []
+                for i in range(n):
+                    xi, yi = poly[i]
+                    xj, yj = poly[(i + 1) % n]
+                    if (yi > y) != (yj > y):
+                        xs.append((xj - xi) * (y - yi) / (yj - yi + 1e-9) + xi)
+                xs.sort()
+                base = y * width
+                for k in range(len(xs) - 1, 0, -2):
+                    x0 = max(0, ceil(xs[k - 1]))
+                    x1 = min(width, ceil(xs[k]))
+                    if x1 > x0:
+                        data[base + x0:base + x1] = bytes([idx]) * (x1 - x0)
+        return grid
+
+    def __bool__(self) -> bool:
+        return self.width > 0 and self.height > 0
+
+    def to_rows(self) -> List[List[int]]:
+        w = self.width
+        return [list(self.data[y * w:(y + 1) * w]) for y in range(self.height)]
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            h = hashlib.sha256(self.data)
+            h.update(f"{self.width}x{self.height}".encode())
+            self._digest = h.hexdigest()[:16]
+        return self._digest
+
+    def _rle(self) -> bytes:
+        # (run length: uint16 LE, value: uint8) triples, long runs are split
+        out = bytearray()
+        data = self.data
+        n = len(data)
+        i = 0
+        while i < n:
+            v = data[i]
+            j = i + 1
+            while j < n and data[j] == v and j - i < 0xFFFF:
+                j += 1
+            run = j - i
+            out += bytes((run & 0xFF, run >> 8, v))
+            i = j
+        return bytes(out)
+
+    def _bitpack(self, bits: int) -> bytes:
+        # LSB-first, row-major
+        out = bytearray((len(self.data) * bits + 7) // 8)
+        acc = 0
+        acc_bits = 0
+        pos = 0
+        for v in self.data:
+            acc |= v << acc_bits
+            acc_bits += bits
+            while acc_bits >= 8:
+                out[pos] = acc & 0xFF
+                pos += 1
+                acc >>= 8
+                acc_bits -= 8
+        if acc_bits:
+            out[pos] = acc & 0xFF
+        return bytes(out)
+
+    def encode(self, fmt: str) -> EncodedTiles:
+        cached = self._encoded.get(fmt)
+        if cached is not None:
+            return cached
+        if fmt == "rle":
+            bits = 8
+            raw = self._rle()
+        elif fmt == "bitpack":
+            bits = max(1, max(self.data, default=0).bit_length())
+            raw = self._bitpack(bits)
+        else:
+            raise ValueError(f"Unknown tile encoding '{fmt}'")
+        encoded = EncodedTiles(
+            encoding=fmt,
+            width=self.width,
+            height=self.height,
+            bits=bits,
+            data=base64.b64encode(raw).decode("ascii"),
+            etag=self.digest
+        )
+        self._encoded[fmt] = encoded
+        return encoded
+
+
+def tiles_payload(grid: TileGrid, fmt: str) -> Union[None, List[List[int]], EncodedTiles]:
+    if fmt == "none":
+        return None
+    if fmt == "legacy":
+        return grid.to_rows()
+    return grid.encode(fmt)